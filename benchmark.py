@@ -0,0 +1,321 @@
+import io
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import tracemalloc
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+import blockchair
+from blockchair import (CHAINS, Blockchair, TransactionFetcher, UTXOTracker, 
+                        Watcher, make_session, parse_dashboard)
+from stub_server import (StubHandler, bitcoin_tracker, busy_block_tracker, 
+                         serve_stub, start_stub_server, synthetic_address, 
+                         synthetic_btc_transaction, synthetic_dashboard)
+
+# Keeps the shared rate limiter out of the measurement
+UNLIMITED = 10**9
+
+# Peak resident set size of this process in MiB. ru_maxrss is in KiB on Linux
+# and bytes on macOS; Windows has no resource module and reports it through
+# psutil when installed
+def peak_rss_mib():
+    if sys.platform == 'win32':
+        try:
+            import psutil
+        except ImportError:
+            return float('nan')
+        return psutil.Process().memory_info().peak_wset / 2**20
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+def bench_concurrency(transactions, latency, levels):
+    server = start_stub_server(latency)
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    hashes = [f'{i:064x}' for i in range(transactions)]
+    results = {}
+    for workers in levels:
+        fetcher = TransactionFetcher('bitcoin', max_workers=workers,
+                                     session=make_session(workers),
+                                     base_url=base_url,
+                                     requests_per_minute=UNLIMITED)
+        start = time.perf_counter()
+        data = fetcher.fetch_transactions(hashes)
+        results[workers] = time.perf_counter() - start
+        assert [d['transaction']['hash'] for d in data] == hashes
+    server.shutdown()
+
+    baseline = results[levels[0]]
+    for workers, elapsed in results.items():
+        logging.info(f'{workers:>3} in-flight: {elapsed:.2f}s '
+                     f'({baseline/elapsed:.1f}x)')
+    return results
+
+# The removed per-transaction DataFrame.append loop, via the equivalent concat
+def extract_with_append(data):
+    input_df = pd.DataFrame()
+    output_df = pd.DataFrame()
+    for i in range(len(data)):
+        input_df = pd.concat([input_df, pd.DataFrame(data[i]['inputs'])],
+                             ignore_index=True)
+        output_df = pd.concat([output_df, pd.DataFrame(data[i]['outputs'])],
+                              ignore_index=True)
+    return input_df, output_df
+
+def extract_with_builder(data):
+    btc = bitcoin_tracker(data)
+    return btc.extract_transaction_data()
+
+# Wall time and peak traced memory of one call
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+def bench_extract(sizes, append_max):
+    results = {}
+    for size in sizes:
+        data = [synthetic_btc_transaction(i) for i in range(size)]
+        paths = {'builder': extract_with_builder}
+        if size <= append_max:
+            paths['append'] = extract_with_append
+        for name, func in paths.items():
+            elapsed, peak = measure(func, data)
+            results[(size, name)] = (elapsed, peak)
+            logging.info(f'{size:>7} transactions - {name:<7}: {elapsed:.2f}s, '
+                         f'peak {peak / 2**20:.1f} MiB')
+    return results
+
+# The previous outer merge of all inputs against all outputs on block id
+def transform_with_block_merge(btc):
+    txs_df = pd.merge(btc.input_df[['recipient', 'spending_block_id']],
+                      btc.output_df,
+                      left_on='spending_block_id',
+                      right_on='block_id',
+                      how='outer',
+                      suffixes=('_x', '')
+                      ).rename(columns={'recipient_x': 'from',
+                                        'recipient': 'to'}
+                               ).filter(regex='^(?!.*_x)')
+    return txs_df[(txs_df['from'] == btc.address) |
+                  (txs_df['to'] == btc.address)]
+
+# The indexed join against the previous block merge, whose memory grows with
+# the square of the block's transactions; the result itself is checked by
+# tests/test_transform.py
+def bench_merge(transactions):
+    btc = busy_block_tracker(transactions)
+    paths = {'block merge': transform_with_block_merge,
+             'indexed join': UTXOTracker.transform_transaction_information}
+    for name, func in paths.items():
+        tracemalloc.start()
+        start = time.perf_counter()
+        rows = len(func(btc))
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        logging.info(f'{name:<12}: {rows} rows, {elapsed:.2f}s, '
+                     f'peak {peak / 2**20:.1f} MiB')
+
+# The previous path: the body decoded to text, then to a dict tree, then the
+# calls normalised into a frame
+def parse_with_json(body, key, items_field, records):
+    page = json.loads(body.decode())
+    if records:
+        items = page['data'][key][items_field]
+        page['data'][key][items_field] = pd.json_normalize(items)
+    return page
+
+def parse_with_events(body, key, items_field, records):
+    return parse_dashboard(io.BytesIO(body), key, items_field, records)
+
+# Wall time and peak traced memory of turning one dashboard page into the
+# tracker's summary and items, decoded whole or parsed as events. The body
+# itself is allocated beforehand; the decoded path also holds it as text
+def bench_parse(sizes):
+    if blockchair.ijson is None:
+        logging.warning('ijson is not installed; only the json path is measured')
+    results = {}
+    for chain in ['bitcoin', 'ethereum']:
+        tracker = CHAINS[chain].tracker
+        for size in sizes:
+            key, body = synthetic_dashboard(chain, size)
+            args = (body, key, tracker.items_field, tracker.item_records)
+            paths = {'json': parse_with_json}
+            if blockchair.ijson is not None:
+                paths['events'] = parse_with_events
+            pages = {}
+            for name, func in paths.items():
+                # Timed apart from the traced run, which tracing slows down
+                start = time.perf_counter()
+                pages[name] = func(*args)['data'][key]
+                elapsed = time.perf_counter() - start
+                peak = measure(func, *args)[1]
+                results[(chain, size, name)] = (elapsed, peak)
+                logging.info(f'{chain:<8} {size:>6} items ({len(body) / 2**20:.1f} MiB) - '
+                             f'{name:<6}: {elapsed:.2f}s, peak {peak / 2**20:.1f} MiB')
+            if 'events' in pages:
+                assert pages['events']['address'] == pages['json']['address']
+                items = [page[tracker.items_field] for page in pages.values()]
+                if tracker.item_records:
+                    pd.testing.assert_frame_equal(*items)
+                else:
+                    assert items[0] == items[1]
+    return results
+
+# Whole Blockchair runs against the stub server, which runs in a separate
+# process so that peak RSS is the pipeline's own. Without recorded addresses,
+# synthetic ones of the given chain are generated
+def bench_pipeline(addresses, chain, count, transactions, latency, error_rate,
+                   fixtures, output_format, backend='dashboards', api_key=None):
+    if not addresses:
+        addresses = [synthetic_address(chain, n) for n in range(count)]
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve_stub, daemon=True,
+                                     args=(port_queue, latency, error_rate,
+                                           fixtures, addresses, transactions))
+    server.start()
+    base_url = f'http://127.0.0.1:{port_queue.get()}'
+
+    # Client-side latency of every request
+    latencies = []
+    statuses = []
+    def record(response, *args, **kwargs):
+        latencies.append(response.elapsed.total_seconds())
+        statuses.append(response.status_code)
+    session = make_session()
+    session.hooks['response'].append(record)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            start = time.perf_counter()
+            blockchair = Blockchair(addresses, 'bench', api_key=api_key,
+                                    requests_per_minute=UNLIMITED, backend=backend,
+                                    output_format=output_format, session=session,
+                                    base_url=base_url)
+            elapsed = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+    server.terminate()
+
+    # Block rows are the addresses' transactions, whichever backend ran
+    counters = blockchair.metrics.report()['counters']
+    transactions = counters.get('block_rows', 0)
+    p50, p99 = np.percentile(latencies, [50, 99])
+    peak = peak_rss_mib()
+    results = {'transactions': transactions, 'seconds': elapsed,
+               'tx_per_second': transactions / elapsed, 'requests': len(latencies),
+               'bytes_received': counters.get('bytes_received', 0),
+               'throttled': statuses.count(429), 'p50_latency': p50,
+               'p99_latency': p99, 'peak_rss_mib': peak,
+               'stages': blockchair.metrics.report()['stages']}
+    logging.info(f"{len(addresses)} addresses, {results['transactions']} transactions "
+                 f"in {elapsed:.2f}s ({results['tx_per_second']:.0f} tx/s)")
+    logging.info(f"{results['requests']} requests ({results['throttled']} throttled), "
+                 f"{results['bytes_received'] / 2**20:.1f} MiB - "
+                 f"p50 {p50 * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms")
+    logging.info(f'Peak RSS {peak:.0f} MiB - {blockchair.metrics.summary()}')
+    return results
+
+# Watch mode over a watchlist where only the first active addresses keep
+# gaining a transaction every period seconds, against cron-style full runs
+# every min_interval seconds for the same duration
+def bench_watch(chain, count, active, transactions, latency, duration, period=1.0,
+                min_interval=0.5, max_interval=10.0):
+    addresses = [synthetic_address(chain, n) for n in range(count)]
+    server = start_stub_server(latency, addresses=addresses, transactions=transactions)
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    # Active addresses were last seen now from the start
+    StubHandler.counts.update((add, transactions) for add in addresses[:active])
+    stop = threading.Event()
+    def grow():
+        while not stop.wait(period):
+            for add in addresses[:active]:
+                StubHandler.counts[add] += 1
+    threading.Thread(target=grow, daemon=True).start()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            watcher = Watcher(addresses, 'bench', 'checkpoint.json',
+                              min_interval=min_interval, max_interval=max_interval,
+                              requests_per_minute=UNLIMITED, output_format='csv',
+                              base_url=base_url)
+            watcher.watch(duration)
+        finally:
+            os.chdir(cwd)
+            stop.set()
+            server.shutdown()
+
+    counters = watcher.metrics.report()['counters']
+    # A full run pages each dashboard and fetches every transaction in chunks
+    pages = -(-transactions // 10000)
+    per_run = count * (pages + (-(-transactions // 10) if chain == 'bitcoin' else 0))
+    cron = int(duration / min_interval) * per_run
+    results = {'polls': counters.get('polls', 0), 'changes': counters.get('changes', 0),
+               'requests': counters.get('requests', 0), 'cron_requests': cron}
+    logging.info(f"{count} addresses ({active} active) for {duration:.0f}s - "
+                 f"{results['polls']} polls, {results['changes']} changes, "
+                 f"{results['requests']} requests; full runs every {min_interval}s "
+                 f"would send {cron}")
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--transactions', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--bench', choices=['fetch', 'extract', 'merge', 'parse',
+                                            'pipeline', 'watch'],
+                        default='fetch')
+    # The append path is quadratic; skip it above this many transactions
+    parser.add_argument('--append-max', type=int, default=10000)
+    # Merge: transactions in the busy block; the old merge needs gigabytes
+    # well before 2000
+    parser.add_argument('--block-transactions', type=int, default=500)
+    # Pipeline: recorded addresses served from fixtures, or synthetic ones
+    parser.add_argument('--address', action='append', default=[])
+    parser.add_argument('--fixtures')
+    parser.add_argument('--chain', choices=['bitcoin', 'ethereum'], default='bitcoin')
+    parser.add_argument('--addresses', type=int, default=4)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--format', choices=['excel', 'csv', 'parquet', 'feather'],
+                        default='csv')
+    parser.add_argument('--backend', choices=['dashboards', 'infinitable'],
+                        default='dashboards')
+    # The stub ignores the key; it only lifts the Infinitable page size
+    parser.add_argument('--api-key')
+    # Watch: how many of the addresses keep changing, and for how long
+    parser.add_argument('--active', type=int, default=1)
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.bench == 'fetch':
+        bench_concurrency(args.transactions, args.latency, [1, 4, 16, 64])
+    elif args.bench == 'extract':
+        bench_extract([1000, 10000, 100000], args.append_max)
+    elif args.bench == 'merge':
+        bench_merge(args.block_transactions)
+    elif args.bench == 'parse':
+        bench_parse([1000, 10000])
+    elif args.bench == 'pipeline':
+        bench_pipeline(args.address, args.chain, args.addresses, args.transactions,
+                       args.latency, args.error_rate, args.fixtures, args.format,
+                       args.backend, args.api_key)
+    elif args.bench == 'watch':
+        bench_watch(args.chain, args.addresses, args.active, args.transactions,
+                    args.latency, args.duration)
@@ -1,473 +1,1837 @@
 import os
-import sys
+import re
 import time
 import json
+import heapq
+import hashlib
+import random
+import sqlite3
 import logging
+import threading
 import datetime 
 import requests
+from abc import ABC, abstractmethod
 import numpy as np
 import pandas as pd
-from urllib.request import urlopen
+from decimal import Decimal
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 logging.basicConfig(format='%(asctime)s : %(levelname)s : %(message)s', 
                     level=logging.INFO, 
                     datefmt='%H:%M:%S')
 
+API_URL = 'https://api.blockchair.com'
+# dashboards/transactions accepts up to 10 comma-separated hashes per call
+CHUNK_SIZE = 10
+MAX_WORKERS = 4
+# Default requests per minute for keyless and keyed Blockchair plans
+KEYLESS_REQUESTS_PER_MINUTE = 30
+KEYED_REQUESTS_PER_MINUTE = 300
+# Payment required / too many requests / Blockchair-specific limit exceeded
+RETRY_STATUS = (402, 429, 430)
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Largest page the address dashboards return
+DASHBOARD_LIMIT = 10000
+# Largest Infinitable page (bitcoin/outputs, ethereum/calls, ...) without
+# and with an API key
+TABLE_LIMIT = 100
+KEYED_TABLE_LIMIT = 10000
+# Where transaction data comes from: per-address dashboards plus batched
+# dashboards/transactions, or the Infinitable endpoints filtered by address
+BACKENDS = ('dashboards', 'infinitable')
+# Watch mode polls an address every WATCH_IDLE_FACTOR of the time since it
+# was last active, within these bounds in seconds
+WATCH_MIN_INTERVAL = 60
+WATCH_MAX_INTERVAL = 6 * 60 * 60
+WATCH_IDLE_FACTOR = 0.1
+# Share of the plan's requests per minute that scheduled polls may use; the
+# rest is left for the transactions of addresses that changed
+WATCH_POLL_SHARE = 0.5
+
+# Column dtypes of the UTXO chains (bitcoin and its forks), whose base-unit
+# amounts are exact in int64
+UTXO_DTYPES = {
+    'block': {'block_id': 'Int64', 'id': 'Int64', 
+              'date': 'datetime', 'time': 'datetime', 
+              'size': 'Int64', 'weight': 'Int64', 'version': 'Int64', 
+              'lock_time': 'Int64', 'is_coinbase': 'boolean', 
+              'has_witness': 'boolean', 'input_count': 'Int64', 
+              'output_count': 'Int64', 'input_total': 'Int64', 
+              'output_total': 'Int64', 'fee': 'Int64', 'is_rbf': 'boolean'},
+    'transaction': {'block_id': 'Int64', 'transaction_id': 'Int64', 
+                    'index': 'Int64', 'date': 'datetime', 
+                    'time': 'datetime', 'value': 'Int64', 'value_usd': 'float64', 
+                    'is_from_coinbase': 'boolean', 'is_spendable': 'boolean', 
+                    'is_spent': 'boolean', 'spending_block_id': 'Int64', 
+                    'spending_transaction_id': 'Int64', 'spending_index': 'Int64', 
+                    'spending_date': 'datetime', 
+                    'spending_time': 'datetime', 
+                    'spending_value_usd': 'float64', 
+                    'spending_sequence': 'Int64', 'lifespan': 'Int64', 
+                    'cdd': 'float64'},
+}
+
+# Column dtypes and base-unit conversions of a UTXO chain's frames
+def utxo_schemas(unit, decimals=8):
+    suffix = unit.lower()
+    return {
+        'block': {
+            'dtypes': UTXO_DTYPES['block'],
+            'units': {'input_total': (f'input_total_{suffix}', decimals), 
+                      'output_total': (f'output_total_{suffix}', decimals)},
+        },
+        'transaction': {
+            'dtypes': UTXO_DTYPES['transaction'],
+            'units': {'value': (f'value_{suffix}', decimals)},
+        },
+    }
+
+# Ethereum amounts arrive in wei and are parsed to Decimal; the _eth columns
+# divide them by 10**18 exactly
+ETHEREUM_SCHEMAS = {
+    'summary': {
+        'dtypes': {'balance': 'decimal', 'fees_approximate': 'decimal', 
+                   'received_approximate': 'decimal', 
+                   'spent_approximate': 'decimal', 'call_count': 'Int64', 
+                   'transaction_count': 'Int64'},
+        'units': {'balance': ('balance_eth', 18), 
+                  'fees_approximate': ('fees_approximate_eth', 18), 
+                  'received_approximate': ('received_approximate_eth', 18), 
+                  'spent_approximate': ('spent_approximate_eth', 18)},
+    },
+    'block': {
+        'dtypes': {'block_id': 'Int64', 'time': 'datetime', 
+                   'value': 'decimal', 'transferred': 'boolean'},
+        'units': {'value': ('value_eth', 18)},
+    },
+    'transaction': {
+        'dtypes': {'block_id': 'Int64', 'id': 'Int64', 'date': 'datetime', 
+                   'time': 'datetime', 'failed': 'boolean', 
+                   'call_count': 'Int64', 'gas_used': 'Int64', 
+                   'gas_limit': 'Int64', 'value': 'decimal', 
+                   'internal_value': 'decimal', 'fee': 'decimal', 
+                   'gas_price': 'decimal', 'effective_gas_price': 'decimal', 
+                   'max_fee_per_gas': 'decimal', 
+                   'max_priority_fee_per_gas': 'decimal', 
+                   'base_fee_per_gas': 'decimal'},
+        'units': {'value': ('value_eth', 18), 
+                  'internal_value': ('internal_value_eth', 18), 
+                  'fee': ('fee_eth', 18), 
+                  'gas_price': ('gas_price_eth', 18), 
+                  'effective_gas_price': ('effective_gas_price_eth', 18), 
+                  'max_fee_per_gas': ('max_fee_per_gas_eth', 18), 
+                  'max_priority_fee_per_gas': ('max_priority_fee_per_gas_eth', 18), 
+                  'base_fee_per_gas': ('base_fee_per_gas_eth', 18)},
+    },
+}
+
+# Output column names of the UTXO chains; {suffix} is the lower-case unit,
+# {unit} the coin and {base} its base unit
+UTXO_RENAMES = {
+    'summary': {'balance': 'Balance ({base})',
+                'balance_{suffix}': 'Balance ({unit})',
+                'balance_usd': 'Balance (USD)',
+                'first_seen_receiving': 'First Seen Receiving',
+                'first_seen_spending': 'First Seen Spending',
+                'last_seen_receiving': 'Last Seen Receiving',
+                'last_seen_spending': 'Last Seen Spending',
+                'transaction_count': 'Transaction Count',                       
+                'output_count': 'Output Count',
+                'unspent_output_count': 'Unspent Output Count',
+                'received': 'Received ({base})',
+                'received_{suffix}': 'Received ({unit})',
+                'received_usd': 'Received (USD)',
+                'spent': 'Spent ({base})',
+                'spent_{suffix}': 'Spent ({unit})',
+                'spent_usd': 'Spent (USD)',
+                'script_hex': 'Script Hex',
+                'scripthash_type': 'Script Hash Type',
+                'type': 'Type'
+                },
+    'block': {'block_id': 'Block ID',
+              'id': 'ID',
+              'hash': 'Transaction Hash',
+              'date': 'Date',
+              'time': 'DateTime',
+              'size': 'Size',
+              'weight': 'Weight',
+              'version': 'Version',
+              'lock_time': 'Lock Time',
+              'is_coinbase': 'From Coinbase',
+              'has_witness': 'Has Witness',
+              'input_count': 'Input Count',
+              'output_count': 'Output Count',
+              'input_total': 'Input Total ({base})',
+              'input_total_{suffix}': 'Input Total ({unit})',
+              'input_total_usd': 'Input Total (USD)',
+              'output_total': 'Output Total ({base})',
+              'output_total_{suffix}': 'Output Total ({unit})',
+              'output_total_usd': 'Output Total (USD)',
+              'fee': 'Fee ({base})',
+              'fee_usd': 'Fee (USD)',
+              'fee_per_kb': 'Fee per size ({base})',
+              'fee_per_kb_usd': 'Fee per size (USD)',
+              'fee_per_kwu': 'Fee per weight ({base})',
+              'fee_per_kwu_usd': 'Fee per weight (USD)',
+              'cdd_total': 'CDD (Coin Days Destroyed) Total',
+              'is_rbf': 'Replace-By-Fee (RBF)'
+              },
+    'transaction': {'from': 'From',
+                    'to': 'To',
+                    'block_id': 'Block ID',
+                    'transaction_id': 'Transaction ID',
+                    'index': 'Index',
+                    'transaction_hash': 'Transaction Hash',
+                    'date': 'Date',
+                    'time': 'DateTime',
+                    'value': 'Value ({base})',
+                    'value_{suffix}' : 'Value ({unit})',
+                    'value_usd': 'Value (USD)',
+                    'type': 'Type',
+                    'script_hex': 'Script Hex',
+                    'is_from_coinbase': 'From Coinbase',
+                    'is_spendable': 'Spendable',
+                    'is_spent': 'Spent',
+                    'spending_block_id': 'Spending Block ID',
+                    'spending_transaction_id': 'Spending Transaction ID',
+                    'spending_index': 'Spending Index',
+                    'spending_transaction_hash': 'Spending Transaction Hash',
+                    'spending_date': 'Spending Date',
+                    'spending_time': 'Spending DateTime',
+                    'spending_value_usd': 'Spending Value (USD)',
+                    'spending_sequence': 'Spending Sequence',
+                    'spending_signature_hex': 'Spending Signature Hex',
+                    'spending_witness': 'Spending Witness',
+                    'lifespan': 'Lifespan',
+                    'cdd': 'CDD (Coin Days Destroyed)'
+                    },
+}
+
+def utxo_renames(unit, base):
+    return {frame: {column.format(suffix=unit.lower()): name.format(unit=unit, base=base) 
+                    for column, name in columns.items()} 
+            for frame, columns in UTXO_RENAMES.items()}
+
+ETHEREUM_RENAMES = {
+    'summary': {'balance': 'Balance (Wei)',
+                'balance_eth': 'Balance (ETH)',
+                'balance_usd': 'Balance (USD)',
+                'call_count': 'Call Count',
+                'contract_code_hex': 'Contract Code Hex',
+                'contract_created': 'Contract Created',
+                'contract_destroyed': 'Contract Destroyed',
+                'fees_approximate': 'Fees Approximate (Wei)',
+                'fees_approximate_eth': 'Fees Approximate (ETH)',
+                'fees_usd': 'Fees (USD)',
+                'first_seen_receiving': 'First Seen Receiving',
+                'first_seen_spending': 'First Seen Spending',
+                'last_seen_receiving': 'Last Seen Receiving',
+                'last_seen_spending': 'Last Seen Spending',
+                'received_approximate': 'Received Approximate (Wei)',
+                'received_approximate_eth': 'Received Approximate (ETH)',
+                'received_usd': 'Received (USD)',
+                'receiving_call_count': 'Receiving Call Count',
+                'spending_call_count': 'Spending Call Count',
+                'spent_approximate': 'Spent Approximate (Wei)',
+                'spent_approximate_eth': 'Spending Approximate (ETH)',
+                'spent_usd': 'Spent (USD)',
+                'transaction_count': 'Transaction Count',
+                'type': 'Type'
+                },
+    'block': {'block_id': 'Block ID',
+              'transaction_hash': 'Transaction Hash',
+              'index': 'Index',
+              'time': 'DateTime',
+              'sender': 'From',
+              'recipient': 'To',
+              'value': 'Value (Wei)',
+              'value_eth': 'Value (ETH)',
+              'value_usd': 'Value (USD)',
+              'transferred': 'Transferred',
+              },
+    'transaction': {'block_id': 'Block ID',
+                    'id': 'ID',
+                    'index': 'Index',
+                    'hash': 'Transaction Hash',
+                    'date': 'Date',
+                    'time': 'DateTime',
+                    'failed': 'Failed',
+                    'type': 'Type',
+                    'sender': 'From',
+                    'recipient': 'To',
+                    'call_count': 'Call Count',
+                    'value': 'Value (Wei)',
+                    'value_eth' : 'Value (ETH)',
+                    'value_usd': 'Value (USD)',
+                    'internal_value': 'Internal Value (Wei)',
+                    'internal_value_eth': 'Internal Value (ETH)',
+                    'internal_value_usd': 'Internal Value (USD)',
+                    'fee': 'Fee (Wei)',
+                    'fee_eth': 'Fee (ETH)',
+                    'fee_usd': 'Fee (USD)',
+                    'gas_used': 'Gas Used',
+                    'gas_limt': 'Gas Limit',
+                    'gas_price': 'Gas Price (Wei)',
+                    'gas_price_eth': 'Gas Price (ETH)',
+                    'effective_gas_price': 'Effective Gas Price (Wei)',
+                    'effective_gas_price_eth': 'Effective Gas Price (ETH)',
+                    'max_fee_per_gas': 'Max Fee per Gas (Wei)',
+                    'max_fee_per_gas_eth': 'Max Fee per Gas (ETH)',
+                    'max_priority_fee_per_gas': 'Max Priority Fee per Gas (Wei)',
+                    'max_priority_fee_per_gas_eth': 'Max Priority Fee per Gas (ETH)',
+                    'base_fee_per_gas': 'Base Fee per Gas (Wei)',
+                    'base_fee_per_gas_eth': 'Base Fee per Gas (ETH)',
+                    'input_hex': 'Input Hex',
+                    'nonce': 'Nonce',
+                    'version': 'Version',
+                    'burned': 'Burned',
+                    'v': 'v',
+                    'r': 'r',
+                    's': 's',
+                    'type_2718': 'type_2718'
+                    },
+}
+
+def to_decimal(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return Decimal('NaN')
+    return Decimal(value if isinstance(value, (int, str)) else str(value))
+
+def cast_column(column, dtype):
+    if dtype == 'datetime':
+        return pd.to_datetime(column, errors='coerce')
+    if dtype == 'decimal':
+        values = np.fromiter(map(to_decimal, column), dtype=object, count=len(column))
+        return pd.Series(values, index=column.index, dtype=object)
+    return column.astype(dtype)
+
+# Integer columns divide as a whole array; Decimal columns scale exactly
+def scale_column(column, decimals):
+    if column.dtype == object:
+        values = column.to_numpy() * Decimal(10) ** -decimals
+        return pd.Series(values, index=column.index, dtype=object)
+    return column / pow(10, decimals)
+
+def apply_schema(frame, schema):
+    columns = {}
+    for column, dtype in schema['dtypes'].items():
+        if column in frame:
+            columns[column] = cast_column(frame[column], dtype)
+    for source, (target, decimals) in schema['units'].items():
+        if source in frame:
+            columns[target] = scale_column(columns.get(source, frame[source]), decimals)
+    return frame.assign(**columns)
+
+# Connection pool large enough for every in-flight request
+def mount_pool(session, pool_size=MAX_WORKERS):
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def make_session(pool_size=MAX_WORKERS):
+    return mount_pool(requests.Session(), pool_size)
+
+# Request path and query without host or API key, so fixtures recorded
+# against the API replay against any base URL and with any key
+def fixture_key(url):
+    parts = urlsplit(url)
+    query = '&'.join(param for param in parts.query.split('&') 
+                     if param and not param.startswith('key='))
+    return f'{parts.path}?{query}' if query else parts.path
+
+def fixture_path(directory, url):
+    digest = hashlib.sha1(fixture_key(url).encode()).hexdigest()
+    return os.path.join(directory, f'{digest}.json')
+
+# Session that saves every successful response as a fixture file (record)
+# or answers from those files without touching the network (replay)
+class FixtureSession(requests.Session):
+    def __init__(self, directory, record=False, pool_size=MAX_WORKERS):
+        super().__init__()
+        mount_pool(self, pool_size)
+        self.directory = directory
+        self.record = record
+        os.makedirs(directory, exist_ok=True)
+    
+    def get(self, url, **kwargs):
+        path = fixture_path(self.directory, url)
+        if self.record:
+            response = super().get(url, **kwargs)
+            if response.status_code == 200:
+                self.save(path, url, response)
+            return response
+        if not os.path.exists(path):
+            raise Exception(f'No fixture recorded for {fixture_key(url)}')
+        with open(path) as f:
+            fixture = json.load(f)
+        response = requests.Response()
+        response.status_code = fixture['status_code']
+        response._content = fixture['body'].encode()
+        response._content_consumed = True
+        response.encoding = 'utf-8'
+        response.url = url
+        return response
+    
+    def save(self, path, url, response):
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'url': fixture_key(url), 
+                       'status_code': response.status_code, 
+                       'body': response.text}, f)
+        os.replace(tmp, path)
+
+def chunk_hashes(hashes, size=CHUNK_SIZE):
+    return [','.join(hashes[i:i+size]) for i in range(0, len(hashes), size)]
+
+# Seconds to wait from a Retry-After header (delta-seconds or HTTP date)
+def parse_retry_after(value):
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = datetime.datetime.now(retry_at.tzinfo)
+    return max(0.0, (retry_at - now).total_seconds())
+
+# Wall time per pipeline stage and run counters, shared by the fetchers and
+# trackers of a run; safe to update from the fetcher's worker threads
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+    
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+    
+    def add_time(self, stage, seconds, calls=1):
+        with self.lock:
+            total = self.stages.setdefault(stage, {'seconds': 0.0, 'calls': 0})
+            total['seconds'] += seconds
+            total['calls'] += calls
+    
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+    
+    def report(self):
+        with self.lock:
+            return {'stages': {stage: dict(total) for stage, total in self.stages.items()}, 
+                    'counters': dict(self.counters)}
+    
+    # Adds a report from another process, e.g. a process pool worker
+    def merge(self, report):
+        for stage, total in report['stages'].items():
+            self.add_time(stage, total['seconds'], total['calls'])
+        for name, value in report['counters'].items():
+            self.count(name, value)
+    
+    def to_json(self):
+        return json.dumps(self.report(), indent=2)
+    
+    # Prometheus text exposition format, e.g. for a node_exporter textfile
+    def to_prometheus(self, prefix='blockchair'):
+        report = self.report()
+        lines = [f'# TYPE {prefix}_stage_seconds_total counter']
+        lines += [f'{prefix}_stage_seconds_total{{stage="{stage}"}} {total["seconds"]:.6f}' 
+                  for stage, total in report['stages'].items()]
+        lines.append(f'# TYPE {prefix}_stage_calls_total counter')
+        lines += [f'{prefix}_stage_calls_total{{stage="{stage}"}} {total["calls"]}' 
+                  for stage, total in report['stages'].items()]
+        for name, value in report['counters'].items():
+            lines.append(f'# TYPE {prefix}_{name}_total counter')
+            lines.append(f'{prefix}_{name}_total {value}')
+        return '\n'.join(lines) + '\n'
+    
+    def summary(self):
+        return ', '.join(f'{stage} {total["seconds"]:.2f}s' 
+                         for stage, total in self.report()['stages'].items())
+
+# Token bucket shared by every tracker using the same Blockchair plan
+class RateLimiter:
+    _shared = {}
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, requests_per_minute):
+        self.rate = requests_per_minute / 60
+        self.capacity = max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    # One limiter per API key and requests per minute (the plan's default
+    # when not given), so a run asking for another rate does not share the
+    # budget of, or change the rate for, earlier runs with the same key
+    @classmethod
+    def for_plan(cls, api_key=None, requests_per_minute=None):
+        if requests_per_minute is None:
+            requests_per_minute = (KEYLESS_REQUESTS_PER_MINUTE 
+                                   if api_key is None 
+                                   else KEYED_REQUESTS_PER_MINUTE)
+        plan = (api_key, requests_per_minute)
+        with cls._shared_lock:
+            if plan not in cls._shared:
+                cls._shared[plan] = cls(requests_per_minute)
+            return cls._shared[plan]
+    
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, 
+                          self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    # Block until a request may be sent
+    def acquire(self):
+        while True:
+            with self.lock:
+                self.refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+    
+    # Hold back every caller for at least delay seconds after a throttle
+    def backoff(self, delay):
+        with self.lock:
+            self.refill()
+            self.tokens = min(self.tokens, 1 - delay * self.rate)
+
+# Confirmed transaction payloads keyed by chain + hash in a local SQLite file
+class TransactionCache:
+    def __init__(self, path, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS transactions ('
+                                'chain TEXT, hash TEXT, payload TEXT, '
+                                'size INTEGER, accessed REAL, '
+                                'PRIMARY KEY (chain, hash))')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS accessed_index '
+                                'ON transactions (accessed)')
+        self.connection.commit()
+    
+    # Cached payloads for the given hashes; a lookup counts as a use for LRU
+    def get_many(self, chain, hashes):
+        hashes = list(dict.fromkeys(hashes))
+        found = {}
+        with self.lock:
+            for i in range(0, len(hashes), 500):
+                batch = hashes[i:i+500]
+                rows = self.connection.execute(
+                    'SELECT hash, payload FROM transactions WHERE chain = ? '
+                    f"AND hash IN ({','.join('?' * len(batch))})", 
+                    [chain, *batch])
+                found.update((tx, json.loads(payload)) for tx, payload in rows)
+            now = time.time()
+            self.connection.executemany(
+                'UPDATE transactions SET accessed = ? WHERE chain = ? AND hash = ?', 
+                [(now, chain, tx) for tx in found])
+            self.connection.commit()
+            self.hits += len(found)
+            self.misses += len(hashes) - len(found)
+        return found
+    
+    # Only payloads that can no longer change are kept: the transaction is
+    # confirmed and, on UTXO chains, every output is spent in a confirmed
+    # transaction, since is_spent and the spending_* fields are filled in later
+    @staticmethod
+    def is_final(payload):
+        if payload['transaction']['block_id'] == -1:
+            return False
+        return all(output['is_spent'] and output['spending_block_id'] not in (None, -1)
+                   for output in payload.get('outputs', ()))
+    
+    def put_many(self, chain, payloads):
+        now = time.time()
+        rows = []
+        for tx, payload in payloads.items():
+            if not self.is_final(payload):
+                continue
+            encoded = json.dumps(payload)
+            rows.append((chain, tx, encoded, len(encoded), now))
+        with self.lock:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO transactions VALUES (?, ?, ?, ?, ?)', rows)
+            self.evict()
+            self.connection.commit()
+    
+    # Drop least recently used entries until the cache fits in max_bytes
+    def evict(self):
+        total = self.connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM transactions').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for rowid, size in self.connection.execute(
+                'SELECT rowid, size FROM transactions ORDER BY accessed'):
+            if total <= self.max_bytes:
+                break
+            stale.append((rowid,))
+            total -= size
+        self.connection.executemany('DELETE FROM transactions WHERE rowid = ?', stale)
+        logging.info(f'Evicted {len(stale)} transactions from cache')
+    
+    def stats(self):
+        with self.lock:
+            entries, size = self.connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transactions').fetchone()
+        return {'hits': self.hits, 'misses': self.misses, 
+                'entries': entries, 'bytes': size}
+
+# Per-address progress of the previous run, kept in a JSON file
+class Checkpoint:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.state = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.state = json.load(f)
+    
+    def get(self, chain, address):
+        return self.state.get(f'{chain}:{address}')
+    
+    def update(self, chain, address, **state):
+        with self.lock:
+            self.state[f'{chain}:{address}'] = state
+            with open(f'{self.path}.tmp', 'w') as f:
+                json.dump(self.state, f, indent=2)
+            os.replace(f'{self.path}.tmp', self.path)
+
+# Records accumulated column by column so each frame is built once
+class ColumnBuilder:
+    def __init__(self):
+        self.columns = {}
+        self.rows = 0
+    
+    def extend(self, records):
+        for record in records:
+            for key in record:
+                if key not in self.columns:
+                    self.columns[key] = [None] * self.rows
+            for key, column in self.columns.items():
+                column.append(record.get(key))
+            self.rows += 1
+    
+    # Columns are released as they are converted, leaving the builder empty
+    def to_frame(self):
+        columns = {key: pd.Series(self.columns.pop(key)) for key in list(self.columns)}
+        self.rows = 0
+        return pd.DataFrame(columns, copy=False)
+
+# File-like view of a streamed response for the incremental parser, read
+# (and decompressed) one chunk at a time
+class ResponseReader:
+    def __init__(self, response, chunk_size=64 * 1024):
+        self.chunks = response.iter_content(chunk_size)
+        self.size = 0
+    
+    def read(self, size=-1):
+        chunk = next(self.chunks, b'')
+        self.size += len(chunk)
+        return chunk
+
+# Address dashboard page parsed chunk by chunk: the summary becomes a dict
+# and the items go straight into columns (records) or a list (hashes) as
+# they complete, while the other arrays of the page, such as utxo, are
+# parsed without being built
+def parse_dashboard(body, key, items_field, records=False):
+    summary = ijson.sendable_list()
+    parsed = ijson.sendable_list()
+    parsers = [ijson.items_coro(summary, f'data.{key}.address', use_float=True), 
+               ijson.items_coro(parsed, f'data.{key}.{items_field}.item', use_float=True)]
+    items = ColumnBuilder() if records else []
+    while True:
+        chunk = body.read(64 * 1024)
+        for parser in parsers:
+            if chunk:
+                parser.send(chunk)
+            else:
+                parser.close()
+        items.extend(parsed)
+        del parsed[:]
+        if not chunk:
+            break
+    return {'data': {key: {'address': summary[0] if summary else None, 
+                           items_field: items.to_frame() if records else items}}}
+
+# Walks the offset/limit pages of an address dashboard, newest activity first.
+# Record items (Ethereum calls) are held as a DataFrame, hashes as a list
+class AddressPager:
+    def __init__(self, fetcher, url, key, items_field, count_field, item_hashes, 
+                 page_size=DASHBOARD_LIMIT, records=False):
+        self.fetcher = fetcher
+        self.url = url
+        self.key = key
+        self.items_field = items_field
+        self.count_field = count_field
+        self.item_hashes = item_hashes
+        self.page_size = min(page_size, DASHBOARD_LIMIT)
+        self.records = records
+    
+    # Parsed incrementally when ijson is installed, else decoded whole
+    def get_page(self, url):
+        if ijson is not None:
+            return self.fetcher.get_streamed(url, lambda body: parse_dashboard(
+                body, self.key, self.items_field, self.records))
+        page = self.fetcher.get_json(url)
+        address = page['data'][self.key]
+        if self.records:
+            items = ColumnBuilder()
+            items.extend(address[self.items_field])
+            address[self.items_field] = items.to_frame()
+        return page
+    
+    # One-item page: the address summary and its latest activity
+    def first_page(self):
+        with self.fetcher.metrics.timer('address_fetch'):
+            return self.get_page(f'{self.url}?limit=1')
+    
+    # Current activity count from a one-item page
+    def count(self):
+        return self.first_page()['data'][self.key]['address'][self.count_field]
+    
+    # Non-empty pages, stopping after max_items or at the first stop_hash
+    def pages(self, max_items=None, stop_hash=None):
+        offset = 0
+        page_number = 0
+        while max_items is None or offset < max_items:
+            limit = self.page_size
+            if max_items is not None:
+                limit = min(limit, max_items - offset)
+            with self.fetcher.metrics.timer('address_fetch'):
+                page = self.get_page(f'{self.url}?limit={limit}&offset={offset}')
+            address = page['data'][self.key]
+            items = address[self.items_field]
+            received = len(items)
+            hashes = self.item_hashes(items)
+            stopped = stop_hash is not None and stop_hash in hashes
+            if stopped:
+                items = items[:hashes.index(stop_hash)]
+                address[self.items_field] = items
+            offset += len(items)
+            page_number += 1
+            logging.info(f'Page {page_number} - {len(items)} {self.items_field} '
+                         f'({offset}/{address["address"][self.count_field]})')
+            if len(items):
+                yield page
+            if stopped or received < limit:
+                return
+
+# Walks an Infinitable filtered by a q expression, limit rows at a time
+class TablePager:
+    def __init__(self, fetcher, url, limit=TABLE_LIMIT):
+        self.fetcher = fetcher
+        self.url = url
+        self.limit = limit
+    
+    # Non-empty pages of rows from table, e.g. outputs with q=recipient(...)
+    def pages(self, table, query):
+        offset = 0
+        while True:
+            url = f'{self.url}/{table}?q={query}&limit={self.limit}&offset={offset}'
+            with self.fetcher.metrics.timer('table_fetch'):
+                page = self.fetcher.get_json(url)
+            rows = page['data']
+            offset += len(rows)
+            logging.info(f'{table} {query} - {offset}/{page["context"]["total_rows"]} rows')
+            if rows:
+                yield rows
+            if len(rows) < self.limit:
+                return
+
+# Rows of an incremental run appended to the sheets written by earlier runs
+def append_to_existing(file_name, sheets):
+    if not os.path.exists(file_name):
+        return sheets
+    existing = pd.read_excel(file_name, sheet_name=list(sheets))
+    return {name: pd.concat([existing[name], df], ignore_index=True) 
+            for name, df in sheets.items()}
+
+# Sink for the Summary, Block and Transaction datasets of one address. Batches
+# arrive newest page first; Summary is always replaced, the others are
+# appended to earlier runs when append is set
+class Output(ABC):
+    def __init__(self, file_name, append=False, spec=None):
+        self.file_name = file_name
+        self.append = append
+        self.path = file_name
+        # Chain whose datasets are written, for formats with fixed column types
+        self.spec = spec
+    
+    @abstractmethod
+    def write(self, name, df):
+        pass
+    
+    def close(self):
+        pass
+
+# One workbook with a sheet per dataset; sheets are held until close
+class ExcelOutput(Output):
+    def __init__(self, file_name, append=False, spec=None):
+        super().__init__(file_name, append, spec)
+        self.path = f'{file_name}.xlsx'
+        self.sheets = {}
+    
+    def write(self, name, df):
+        self.sheets.setdefault(name, []).append(df)
+    
+    def close(self):
+        # Pages arrive newest first while each frame is ordered oldest first
+        sheets = {name: pd.concat(frames[::-1], ignore_index=True) 
+                  for name, frames in self.sheets.items()}
+        if self.append:
+            sheets.update(append_to_existing(self.path, {
+                name: df for name, df in sheets.items() if name != 'Summary'}))
+        with pd.ExcelWriter(self.path, engine='xlsxwriter') as writer:
+            for name, df in sheets.items():
+                df.to_excel(writer, sheet_name=name, index=False)
+
+# A directory per address with one CSV file per dataset, appended batch by batch
+class CSVOutput(Output):
+    def __init__(self, file_name, append=False, spec=None):
+        super().__init__(file_name, append, spec)
+        os.makedirs(file_name, exist_ok=True)
+        self.started = set()
+    
+    def write(self, name, df):
+        path = os.path.join(self.path, f'{name.lower()}.csv')
+        append = name in self.started or (self.append and name != 'Summary' 
+                                          and os.path.exists(path))
+        df.to_csv(path, mode='a' if append else 'w', header=not append, index=False)
+        self.started.add(name)
+
+# Arrow type of each output column whose dtype the chain's schemas fix, by
+# dataset; dates are left to inference, which keeps their dtype when empty
+def arrow_types(spec):
+    types = {'Int64': pa.int64(), 'boolean': pa.bool_(), 'float64': pa.float64(), 
+             'decimal': pa.decimal256(76, 18)}
+    datasets = {}
+    for frame, schema in spec.schemas.items():
+        columns = {column: types[dtype] for column, dtype in schema['dtypes'].items() 
+                   if dtype in types}
+        for source, (target, _) in schema['units'].items():
+            columns[target] = (pa.decimal256(76, 18) 
+                               if schema['dtypes'].get(source) == 'decimal' 
+                               else pa.float64())
+        renames = spec.renames.get(frame, {})
+        datasets[frame.capitalize()] = {renames.get(column, column): dtype 
+                                        for column, dtype in columns.items()}
+    return datasets
+
+# A directory per address with one Arrow dataset directory per dataset. Each
+# run adds a part file; batches become row groups (parquet) or record batches
+class ArrowOutput(Output):
+    extension = None
+    
+    def __init__(self, file_name, append=False, spec=None):
+        if pa is None:
+            raise ImportError(f'pyarrow is required for {self.extension} output')
+        super().__init__(file_name, append, spec)
+        self.part = datetime.datetime.now().strftime('%Y%m%d%H%M%S%f')
+        self.types = {} if spec is None else arrow_types(spec)
+        self.writers = {}
+        # Schema of each dataset, fixed by its first batch and kept by every
+        # later batch of the run
+        self.schemas = {}
+    
+    # Every batch is cast to the dataset's schema; columns missing from a
+    # batch are written as nulls
+    def to_table(self, name, df):
+        df = df.where(df.notna(), None)
+        if name not in self.schemas:
+            self.schemas[name] = self.existing_schema(name) or self.batch_schema(name, df)
+        schema = self.schemas[name]
+        df = df.reindex(columns=schema.names)
+        return pa.Table.from_pandas(df, preserve_index=False).cast(schema)
+    
+    # Column types of the chain's schemas where known; otherwise inferred from
+    # the batch, with decimal amounts sharing one type and columns with no
+    # values yet (null) taken as strings, so a later batch cannot conflict
+    def batch_schema(self, name, df):
+        inferred = pa.Table.from_pandas(df, preserve_index=False).schema
+        types = self.types.get(name, {})
+        fields = []
+        for field in inferred:
+            if field.name in types:
+                field = field.with_type(types[field.name])
+            elif pa.types.is_decimal(field.type):
+                field = field.with_type(pa.decimal256(76, 18))
+            elif pa.types.is_null(field.type):
+                field = field.with_type(pa.large_string())
+            fields.append(field)
+        return pa.schema(fields, metadata=inferred.metadata)
+    
+    # Schema of the latest part written by an earlier run, so incremental
+    # runs add parts with the same schema
+    def existing_schema(self, name):
+        directory = os.path.join(self.path, name.lower())
+        if not self.append or name == 'Summary' or not os.path.isdir(directory):
+            return None
+        parts = sorted(part for part in os.listdir(directory) 
+                       if part.endswith(f'.{self.extension}'))
+        if not parts:
+            return None
+        return self.read_schema(os.path.join(directory, parts[-1]))
+    
+    def write(self, name, df):
+        table = self.to_table(name, df)
+        if name not in self.writers:
+            directory = os.path.join(self.path, name.lower())
+            os.makedirs(directory, exist_ok=True)
+            if not self.append or name == 'Summary':
+                for part in os.listdir(directory):
+                    if part.endswith(f'.{self.extension}'):
+                        os.remove(os.path.join(directory, part))
+            path = os.path.join(directory, f'part-{self.part}.{self.extension}')
+            self.writers[name] = self.open(path, self.schemas[name])
+        self.writers[name].write_table(table)
+    
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+
+class ParquetOutput(ArrowOutput):
+    extension = 'parquet'
+    
+    def open(self, path, schema):
+        return pq.ParquetWriter(path, schema)
+    
+    def read_schema(self, path):
+        return pq.read_schema(path)
+
+class FeatherOutput(ArrowOutput):
+    extension = 'feather'
+    
+    def open(self, path, schema):
+        return pa.ipc.new_file(path, schema)
+    
+    def read_schema(self, path):
+        with pa.ipc.open_file(path) as reader:
+            return reader.schema
+
+OUTPUT_FORMATS = {'excel': ExcelOutput, 
+                  'csv': CSVOutput, 
+                  'parquet': ParquetOutput, 
+                  'feather': FeatherOutput}
+
+class TransactionFetcher:
+    def __init__(self, chain, api_key=None, max_workers=MAX_WORKERS, 
+                 session=None, base_url=None, requests_per_minute=None, 
+                 max_retries=MAX_RETRIES, cache=None, metrics=None):
+        self.chain = chain
+        self.api_key = api_key
+        self.max_workers = max(1, max_workers)
+        self.session = session or make_session(self.max_workers)
+        self.base_url = base_url or API_URL
+        self.limiter = RateLimiter.for_plan(api_key, requests_per_minute)
+        self.max_retries = max_retries
+        self.cache = cache
+        self.metrics = metrics or Metrics()
+        # Payloads fetched ahead of time for several addresses at once
+        self.prefetched = {}
+    
+    # Exponential backoff with jitter unless the server names a delay
+    def retry_delay(self, response, attempt):
+        delay = parse_retry_after(response.headers.get('Retry-After'))
+        if delay is None:
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * pow(2, attempt))
+            delay += random.uniform(0, BACKOFF_BASE)
+        return delay
+    
+    # Response that was not throttled; a streamed body is left unread
+    def get(self, url, stream=False):
+        if self.api_key is not None:
+            url = f"{url}{'&' if '?' in url else '?'}key={self.api_key}"
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            response = self.session.get(url, stream=stream)
+            self.metrics.count('requests')
+            if response.status_code not in RETRY_STATUS:
+                return response
+            self.metrics.count('bytes_received', len(response.content))
+            if attempt == self.max_retries:
+                break
+            self.metrics.count('retries')
+            delay = self.retry_delay(response, attempt)
+            logging.info(f'HTTP {response.status_code} - retrying in {delay:.1f}s')
+            self.limiter.backoff(delay)
+        raise Exception('Exceed API limit - Increase waiting time / Use API key instead')
+    
+    def get_json(self, url):
+        response = self.get(url)
+        self.metrics.count('bytes_received', len(response.content))
+        return response.json()
+    
+    # Result of parse(body) over the response body as it streams in, so the
+    # whole body is never held as bytes, text and objects at once
+    def get_streamed(self, url, parse):
+        response = self.get(url, stream=True)
+        body = ResponseReader(response)
+        try:
+            return parse(body)
+        finally:
+            response.close()
+            self.metrics.count('bytes_received', body.size)
+    
+    def get_transaction(self, txs):
+        return self.get_json(f'{self.base_url}/{self.chain}/dashboards/transactions/{txs}')
+    
+    # Responses are returned in the same order as the joined chunks
+    def fetch(self, joined):
+        if self.max_workers == 1 or len(joined) <= 1:
+            return [self.get_transaction(txs) for txs in joined]
+        workers = min(self.max_workers, len(joined))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.get_transaction, joined))
+    
+    # Fetch the unique hashes of many addresses in full chunks, to be served
+    # by fetch_transactions until clear_prefetched is called
+    def prefetch(self, hashes):
+        hashes = [tx for tx in dict.fromkeys(hashes) if tx not in self.prefetched]
+        self.prefetched.update(zip(hashes, self.fetch_payloads(hashes)))
+    
+    def clear_prefetched(self):
+        self.prefetched = {}
+    
+    # Per-hash payloads from data[...] in the same order as hashes
+    def fetch_transactions(self, hashes):
+        if not self.prefetched:
+            return self.fetch_payloads(hashes)
+        self.prefetch(hashes)
+        return [self.prefetched[tx] for tx in hashes]
+    
+    # Cache hits plus the missing hashes packed into joined chunks
+    def fetch_payloads(self, hashes):
+        cached = {} if self.cache is None else self.cache.get_many(self.chain, hashes)
+        missing = [tx for tx in dict.fromkeys(hashes) if tx not in cached]
+        joined = chunk_hashes(missing)
+        with self.metrics.timer('chunk_fetch'):
+            data = self.fetch(joined)
+        self.metrics.count('transactions_fetched', len(missing))
+        
+        joined = [joined[i].split(',') for i in range(len(joined))]
+        try:
+            fetched = {j: data[i]['data'][j] 
+                       for i in range(len(data)) for j in joined[i]}
+        except TypeError:
+            raise Exception('Exceed API limit - Increase waiting time / Use API key instead')
+        
+        if self.cache is not None:
+            self.cache.put_many(self.chain, fetched)
+            self.metrics.count('cache_hits', len(cached))
+            self.metrics.count('cache_misses', len(missing))
+            logging.info(f'Cache - {len(cached)} hits, {len(missing)} misses')
+        return [cached[tx] if tx in cached else fetched[tx] for tx in hashes]
+
+# What the shared tracker engine needs to know about one chain: its API slug,
+# how to recognise its addresses, the frame schemas (including the unit scale),
+# the output column names and the tracker class extracting its payloads
+class ChainSpec:
+    def __init__(self, name, label, prefix, pattern, tracker, schemas, renames, 
+                 lower_key=False):
+        self.name = name
+        self.label = label
+        self.prefix = prefix
+        self.pattern = re.compile(pattern)
+        self.tracker = tracker
+        self.schemas = schemas
+        self.renames = renames
+        # Dashboards key case-insensitive addresses by their lower-case form
+        self.lower_key = lower_key
+    
+    def matches(self, address):
+        return self.pattern.fullmatch(address) is not None
+
+# Registered chains by API slug; classification tries them in order
+CHAINS = {}
+
+def register_chain(spec):
+    CHAINS[spec.name] = spec
+    return spec
+
+def classify(address):
+    for spec in CHAINS.values():
+        if spec.matches(address):
+            return spec
+
+# Transaction hashes referenced by a tracker's dashboard pages
+def page_hashes(tracker, pages):
+    return [tx for page in pages 
+            for tx in tracker.item_hashes(page['data'][tracker.key][tracker.items_field])]
+
+# Runs in a worker process: normalise, transform and export one address from
+# payloads fetched by the parent, which saves the returned checkpoint entry
+# and merges the returned metrics
+def run_tracker(chain, address, options, pages, payloads):
+    spec = CHAINS[chain]
+    checkpoint = options.pop('checkpoint')
+    fetcher = TransactionFetcher(chain, options['api_key'], base_url=options['base_url'], 
+                                 requests_per_minute=options['requests_per_minute'])
+    fetcher.prefetched = payloads
+    tracker = spec.tracker(spec, address, **options, 
+                           checkpoint=None if checkpoint is None else Checkpoint(checkpoint), 
+                           fetcher=fetcher)
+    tracker.checkpoint = None
+    entry = tracker.checkpoint_entry() if tracker.export(pages) else None
+    return entry, fetcher.metrics.report()
+
 class Blockchair:
-    def __init__(self, address, file_name, api_key=None):
+    def __init__(self, address, file_name, api_key=None, max_workers=MAX_WORKERS, 
+                 requests_per_minute=None, cache=None, checkpoint=None, 
+                 page_size=DASHBOARD_LIMIT, output_format='excel', stream=False, 
+                 batch=False, processes=None, session=None, base_url=None, 
+                 metrics_file=None, prometheus_file=None, backend='dashboards', 
+                 run=True):
         self.address = address
         self.file_name = file_name
         self.api_key = api_key
+        self.max_workers = max_workers
+        self.requests_per_minute = requests_per_minute
+        # Either a TransactionCache or the path of its SQLite file
+        self.cache = TransactionCache(cache) if isinstance(cache, str) else cache
+        # Either a Checkpoint or the path of its JSON file; enables incremental runs
+        self.checkpoint = (Checkpoint(checkpoint) if isinstance(checkpoint, str) 
+                           else checkpoint)
+        self.page_size = page_size
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f'Unknown output format: {output_format}')
+        self.output_format = output_format
+        if backend not in BACKENDS:
+            raise ValueError(f'Unknown backend: {backend}')
+        if backend == 'infinitable' and self.checkpoint is not None:
+            raise ValueError('Checkpoints require the dashboards backend')
+        self.backend = backend
+        self.stream = stream
+        self.batch = batch
+        # Worker processes for the transform and export stage, if any
+        self.processes = processes
+        self.pool = None
+        self.pending = []
+        # One pooled session shared by every address of the run; a
+        # FixtureSession records or replays the run's responses
+        self.session = session or make_session(max_workers)
+        self.base_url = base_url
+        # Stage timings and counters of the run, written out when it ends
+        self.metrics = Metrics()
+        self.metrics_file = metrics_file
+        self.prometheus_file = prometheus_file
+        # Lazy trackers by address, sharing one fetcher per chain; building
+        # them does no I/O
+        self.fetchers = {}
+        self.trackers = {}
+        for add in [address] if type(address) is str else address:
+            spec = self.chain_spec(add)
+            if spec is not None:
+                self.trackers[add] = self.make_tracker(spec, add)
         
-        self.check_multiple_addresses()  
+        if run:
+            self.run()
+    
+    # Fetch, transform and export every address
+    def run(self):
+        with self.metrics.timer('total'):
+            self.check_multiple_addresses()  
+        return self.report_metrics()
     
     def check_multiple_addresses(self):
         if type(self.address) is str:
             self.check_blockchain(self.address)
-        elif type(self.address) is tuple or list:
-            for add in range(len(self.address)):
-                self.check_blockchain(self.address[add])
+            return
+        # Batching and the process pool share dashboard payloads, which the
+        # Infinitable backend does not request
+        if self.backend == 'infinitable':
+            for tracker in self.trackers.values():
+                tracker.export()
+            return
+        if self.processes:
+            self.pool = ProcessPoolExecutor(max_workers=self.processes)
+        try:
+            if self.batch:
+                self.check_batch(self.address)
+            else:
+                for add in range(len(self.address)):
+                    self.check_blockchain(self.address[add])
+            self.wait_for_workers(0)
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
+    
+    def report_metrics(self):
+        logging.info(f'Stage timings - {self.metrics.summary()}')
+        self.write_metrics()
+        return self.metrics.report()
+    
+    def write_metrics(self):
+        if self.metrics_file is not None:
+            with open(self.metrics_file, 'w') as f:
+                f.write(self.metrics.to_json())
+        if self.prometheus_file is not None:
+            with open(self.prometheus_file, 'w') as f:
+                f.write(self.metrics.to_prometheus())
+    
+    def chain_spec(self, add):
+        spec = classify(add)
+        if spec is None:
+            logging.warning(f'Please check input address format: {add}')
+            return
+        logging.info(f'{spec.label} address: {add}')
+        return spec
+    
+    def chain_fetcher(self, chain):
+        if chain not in self.fetchers:
+            self.fetchers[chain] = TransactionFetcher(chain, self.api_key, self.max_workers, 
+                                                      session=self.session, 
+                                                      base_url=self.base_url, 
+                                                      requests_per_minute=self.requests_per_minute, 
+                                                      cache=self.cache, metrics=self.metrics)
+        return self.fetchers[chain]
+    
+    # Each address of a multi-address run gets its own output
+    def tracker_options(self, add):
+        file_name = (self.file_name if type(self.address) is str 
+                     else f'{self.file_name}_{add}')
+        return {'file_name': file_name, 
+                'api_key': self.api_key, 
+                'max_workers': self.max_workers, 
+                'requests_per_minute': self.requests_per_minute, 
+                'checkpoint': self.checkpoint, 
+                'page_size': self.page_size, 
+                'output_format': self.output_format, 
+                'stream': self.stream, 
+                'base_url': self.base_url, 
+                'backend': self.backend}
+    
+    def make_tracker(self, spec, add):
+        return spec.tracker(spec, add, **self.tracker_options(add), cache=self.cache, 
+                            fetcher=self.chain_fetcher(spec.name))
     
     def check_blockchain(self, add):
-        if add[:2] == '0x':
-            logging.info(f'Ethereum address: {add}')
-            ETH(add, self.file_name, self.api_key)
-        elif add[:3] == 'bc1' or add[0] == '1' or '3':
-            logging.info(f'Bitcoin address: {add}')
-            BTC(add, self.file_name, self.api_key)
-        else:
-            logging.warning('Please check input address format')
+        tracker = self.trackers.get(add)
+        if tracker is None:
             return
+        if self.pool is None:
+            tracker.export()
+            return
+        pages = list(tracker.address_pages())
+        hashes = list(dict.fromkeys(page_hashes(tracker, pages)))
+        self.submit(tracker, pages, 
+                    dict(zip(hashes, tracker.fetcher.fetch_transactions(hashes))))
+    
+    # Hand an address to the process pool once fewer than processes are queued,
+    # so fetching the next address overlaps with transforming this one
+    def submit(self, tracker, pages, payloads):
+        self.wait_for_workers(self.processes - 1)
+        options = self.tracker_options(tracker.address)
+        if self.checkpoint is not None:
+            options['checkpoint'] = self.checkpoint.path
+        future = self.pool.submit(run_tracker, tracker.chain, tracker.address, 
+                                  options, pages, payloads)
+        self.pending.append((tracker, future))
+    
+    def wait_for_workers(self, limit):
+        while len(self.pending) > max(limit, 0):
+            done, _ = wait([future for _, future in self.pending], 
+                           return_when=FIRST_COMPLETED)
+            for tracker, future in [item for item in self.pending if item[1] in done]:
+                self.pending.remove((tracker, future))
+                entry, report = future.result()
+                self.metrics.merge(report)
+                if entry is not None and self.checkpoint is not None:
+                    self.checkpoint.update(tracker.chain, tracker.key, **entry)
+    
+    # Collect the transaction hashes of every address on a chain, fetch each
+    # unique hash once in full chunks, then hand the payloads back per address.
+    # Mixed-chain lists are grouped so every chain takes the same path
+    def check_batch(self, addresses):
+        groups = {}
+        for add in addresses:
+            if add in self.trackers:
+                groups.setdefault(self.trackers[add].chain, []).append(self.trackers[add])
+        
+        for chain, trackers in groups.items():
+            fetcher = self.chain_fetcher(chain)
+            pages = [list(tracker.address_pages()) for tracker in trackers]
+            hashes = [tx for tracker, tracker_pages in zip(trackers, pages) 
+                      for tx in page_hashes(tracker, tracker_pages)]
+            unique = len(dict.fromkeys(hashes))
+            logging.info(f'Batch - {len(trackers)} {chain} addresses, '
+                         f'{unique} unique of {len(hashes)} transactions, '
+                         f'{-(-unique // CHUNK_SIZE)} chunks')
+            fetcher.prefetch(hashes)
+            for tracker, tracker_pages in zip(trackers, pages):
+                if self.pool is None:
+                    tracker.export(tracker_pages)
+                    continue
+                payloads = {tx: fetcher.prefetched[tx] 
+                            for tx in page_hashes(tracker, tracker_pages)}
+                self.submit(tracker, tracker_pages, payloads)
+            fetcher.clear_prefetched()
+
+# Latest last_seen time of a dashboard address summary as a Unix timestamp
+def last_active(address):
+    seen = [address.get(field) for field in ('last_seen_receiving', 'last_seen_spending')]
+    return max((datetime.datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+                .replace(tzinfo=datetime.timezone.utc).timestamp() 
+                for value in seen if value), default=None)
+
+# Long-running watch mode over one Blockchair, whose session, fetchers and
+# checkpoint stay warm between polls. Each address's one-item dashboard page
+# is re-polled on a schedule following how recently it was active; its new
+# pages and transactions are fetched and appended to its output only when
+# the activity count moved past the checkpoint
+class Watcher:
+    def __init__(self, address, file_name, checkpoint, min_interval=WATCH_MIN_INTERVAL, 
+                 max_interval=WATCH_MAX_INTERVAL, idle_factor=WATCH_IDLE_FACTOR, 
+                 poll_share=WATCH_POLL_SHARE, **options):
+        if checkpoint is None:
+            raise ValueError('Watching requires a checkpoint')
+        self.blockchair = Blockchair(address, file_name, checkpoint=checkpoint, 
+                                     run=False, **options)
+        self.metrics = self.blockchair.metrics
+        self.limiter = RateLimiter.for_plan(self.blockchair.api_key, 
+                                            self.blockchair.requests_per_minute)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.idle_factor = idle_factor
+        self.poll_share = poll_share
+        self.stopped = threading.Event()
+        # Per-address last activity and poll interval; every address is due
+        # at start, then the queue orders them by their next poll
+        self.states = {add: {'active': None, 'interval': min_interval, 'seen': None} 
+                       for add in self.blockchair.trackers}
+        self.planned = len(self.states) * 60 / min_interval
+        now = time.time()
+        self.queue = [(now, add) for add in self.states]
+        heapq.heapify(self.queue)
+    
+    # Poll due addresses until stop is called or duration seconds have passed
+    def watch(self, duration=None):
+        end = None if duration is None else time.time() + duration
+        self.stopped.clear()
+        try:
+            while self.queue:
+                due, add = self.queue[0]
+                if end is not None and due > end:
+                    self.stopped.wait(max(0.0, end - time.time()))
+                    break
+                if self.stopped.wait(max(0.0, due - time.time())):
+                    break
+                heapq.heappop(self.queue)
+                try:
+                    self.poll(add)
+                except Exception as error:
+                    logging.warning(f'Polling {add} failed: {error}')
+                self.schedule(add)
+        finally:
+            self.blockchair.report_metrics()
+    
+    def stop(self):
+        self.stopped.set()
+    
+    # One summary request; a changed count is exported incrementally and the
+    # tracker replaced by a fresh one reading the new checkpoint. A count
+    # already exported is skipped even while its newest items are unconfirmed
+    # and behind the checkpoint; they are fetched again with the next change
+    def poll(self, add):
+        tracker = self.blockchair.trackers[add]
+        state = self.states[add]
+        with self.metrics.timer('poll'):
+            page = tracker.pager.first_page()
+        self.metrics.count('polls')
+        address = page['data'][tracker.key]['address']
+        count = address[tracker.count_field]
+        active = last_active(address)
+        if active is not None:
+            state['active'] = max(state['active'] or 0.0, active)
+        if tracker.state is not None and count in (tracker.state[tracker.count_field], 
+                                                   state['seen']):
+            return False
+        logging.info(f'{add} - {count} {tracker.items_field}, fetching new activity')
+        if tracker.state is not None:
+            state['active'] = time.time()
+            self.metrics.count('changes')
+        tracker.export(tracker.address_pages(count))
+        state['seen'] = count
+        self.blockchair.trackers[add] = self.blockchair.make_tracker(tracker.spec, add)
+        self.blockchair.write_metrics()
+        return True
+    
+    # A fraction of the time the address has been idle, within the bounds;
+    # addresses with no known activity are polled as rarely as allowed
+    def next_interval(self, state):
+        if state['active'] is None:
+            return self.max_interval
+        idle = max(0.0, time.time() - state['active'])
+        return min(self.max_interval, max(self.min_interval, idle * self.idle_factor))
+    
+    # Every interval is stretched by the same factor while the planned polls
+    # would take more than poll_share of the plan's requests per minute
+    def schedule(self, add):
+        state = self.states[add]
+        interval = self.next_interval(state)
+        self.planned += 60 / interval - 60 / state['interval']
+        state['interval'] = interval
+        scale = max(1.0, self.planned / (self.limiter.rate * 60 * self.poll_share))
+        heapq.heappush(self.queue, (time.time() + interval * scale, add))
 
-class BTC:
-    def __init__(self, btc_address, file_name, api_key=None):
-        self.address = btc_address
-        self.file_name = f'btc_{file_name}.xlsx'
+# Engine shared by every chain: dashboard paging, checkpoints, page-by-page
+# transform and export. Subclasses extract frames from their payload layout.
+# Nothing is requested until summary, blocks, transactions or export is used
+class AddressTracker:
+    items_field = None
+    count_field = None
+    # Whether Block rows come from the transaction payloads
+    blocks_need_transactions = False
+    # Whether dashboard items are records kept as columns, not plain hashes
+    item_records = False
+    
+    def __init__(self, spec, address, file_name, api_key=None, max_workers=MAX_WORKERS, 
+                 requests_per_minute=None, cache=None, checkpoint=None, 
+                 page_size=DASHBOARD_LIMIT, output_format='excel', stream=False, 
+                 base_url=None, backend='dashboards', fetcher=None):
+        self.spec = spec
+        self.chain = spec.name
+        self.address = address
+        self.key = address.lower() if spec.lower_key else address
+        self.file_name = f'{spec.prefix}_{file_name}'
         self.api_key = api_key
-        self.url = f'https://api.blockchair.com/bitcoin/dashboards/address/{btc_address}?limit=10000'
-        self.address_endpoint = json.load(urlopen(self.url))
-        self.session = requests.Session()
-        self.input_df = pd.DataFrame()
-        self.output_df = pd.DataFrame()
-        
-        self.get_address_information()
-        self.get_transaction_endpoint()
-        self.get_block_information()
-        self.extract_transaction_data()
-        self.transform_transaction_information()
-        self.output_excel()
-        
+        self.url = f'{base_url or API_URL}/{spec.name}/dashboards/address/{address}'
+        self.fetcher = fetcher or TransactionFetcher(spec.name, api_key, max_workers, 
+                                                     base_url=base_url, 
+                                                     requests_per_minute=requests_per_minute, 
+                                                     cache=cache)
+        self.metrics = self.fetcher.metrics
+        self.pager = AddressPager(self.fetcher, self.url, self.key, self.items_field, 
+                                  self.count_field, self.item_hashes, page_size, 
+                                  self.item_records)
+        self.backend = backend
+        self.table = TablePager(self.fetcher, f'{base_url or API_URL}/{spec.name}', 
+                                TABLE_LIMIT if api_key is None else KEYED_TABLE_LIMIT)
+        self.checkpoint = checkpoint
+        self.state = None if checkpoint is None else checkpoint.get(spec.name, self.key)
+        self.output_format = output_format
+        self.stream = stream
+        # Memoised dashboard pages and Summary, Block and Transaction frames
+        self.pages = None
+        self.tables = {}
+        self.frames = {}
+        self.page_count = 0
+    
+    # Address summary; a single request unless the pages are already loaded
+    @property
+    def summary(self):
+        if 'Summary' not in self.frames:
+            self.address_endpoint = self.pager.first_page()
+            with self.metrics.timer('transform'):
+                self.frames['Summary'] = self.get_address_information()
+        return self.frames['Summary']
+    
+    @property
+    def blocks(self):
+        if 'Block' not in self.frames:
+            self.load(transactions=self.blocks_need_transactions)
+        return self.frames['Block']
+    
+    @property
+    def transactions(self):
+        if 'Transaction' not in self.frames:
+            self.load()
+        return self.frames['Transaction']
+    
+    # Dashboard pages newer than the checkpoint, or the whole history; a
+    # count already polled saves the request for it
+    def address_pages(self, count=None):
+        if self.state is None:
+            return self.pager.pages()
+        if count is None:
+            count = self.pager.count()
+        new = count - self.state[self.count_field]
+        return self.pager.pages(max(new, 0), self.state['last_hash'])
+    
+    # Transform the new pages into memoised frames, without the transaction
+    # requests if only Block is wanted and the chain allows it
+    def load(self, transactions=True, pages=None):
+        if self.backend == 'infinitable':
+            return self.load_tables(transactions)
+        if pages is None:
+            if self.pages is None:
+                self.pages = list(self.address_pages())
+            pages = self.pages
+        return self.process_pages(pages, transactions)
+    
+    # Write the Summary, Block and Transaction datasets and save the
+    # checkpoint; frames already in memory are written as they are
+    def export(self, pages=None):
+        output = None
+        if 'Transaction' not in self.frames and self.stream and self.backend == 'dashboards':
+            output = self.open_output()
+            self.process_pages(self.address_pages() if pages is None else pages, 
+                               output=output)
+        elif 'Transaction' not in self.frames:
+            self.load(pages=pages)
+        if not self.page_count:
+            logging.info(f'No new transactions since last run: {self.address}')
+            return False
+        self.output_data(output)
+        self.save_checkpoint()
+        return True
+    
+    # The address's own rows from the Infinitable endpoints, at the largest
+    # page size, instead of every full transaction it appears in
+    def load_tables(self, transactions=True):
+        self.summary
+        self.transform_tables(transactions)
+        self.page_count = sum(len(rows) > 0 for rows in self.tables.values())
+        self.frames['Block'] = self.block_df
+        self.metrics.count('block_rows', len(self.block_df))
+        if transactions:
+            self.frames['Transaction'] = self.txs_df
+            self.metrics.count('transaction_rows', len(self.txs_df))
+        return self.page_count > 0
+    
+    # Rows of table matching the address in any of fields, memoised
+    def table_rows(self, table, *fields):
+        if (table, fields) in self.tables:
+            return self.tables[(table, fields)]
+        rows = ColumnBuilder()
+        for field in fields:
+            for page in self.table.pages(table, f'{field}({self.key})'):
+                rows.extend(page)
+                self.metrics.count('table_rows', len(page))
+        self.tables[(table, fields)] = rows.to_frame()
+        return self.tables[(table, fields)]
+    
+    def open_output(self):
+        return OUTPUT_FORMATS[self.output_format](self.file_name, 
+                                                  append=self.state is not None, 
+                                                  spec=self.spec)
+    
+    # Fetch and transform one dashboard page at a time to bound memory; when
+    # streaming to output, each page is written out instead of being kept
+    def process_pages(self, pages, transactions=True, output=None):
+        page_count = 0
+        block_frames = []
+        txs_frames = []
+        for self.address_endpoint in pages:
+            if page_count == 0:
+                with self.metrics.timer('transform'):
+                    self.frames['Summary'] = self.get_address_information()
+                if output is not None:
+                    with self.metrics.timer('export'):
+                        output.write('Summary', self.summary_df)
+                address = self.address_endpoint['data'][self.key]
+                self.item_count = address['address'][self.count_field]
+                self.latest_hash = None
+                self.unconfirmed = 0
+            self.transform_page(transactions)
+            if self.latest_hash is None:
+                self.find_latest_confirmed()
+            page_count += 1
+            self.metrics.count('block_rows', len(self.block_df))
+            if transactions:
+                self.metrics.count('transaction_rows', len(self.txs_df))
+            if output is not None:
+                with self.metrics.timer('export'):
+                    output.write('Block', self.block_df)
+                    output.write('Transaction', self.txs_df)
+            else:
+                block_frames.append(self.block_df)
+                txs_frames.append(self.txs_df if transactions else None)
+        self.page_count = page_count
+        if output is None:
+            # Pages arrive newest first while each frame is ordered oldest first
+            self.frames['Block'] = (pd.concat(block_frames[::-1], ignore_index=True) 
+                                    if block_frames else pd.DataFrame())
+            if transactions:
+                self.frames['Transaction'] = (pd.concat(txs_frames[::-1], ignore_index=True) 
+                                              if txs_frames else pd.DataFrame())
+        return page_count > 0
+    
+    # Typed columns, base units converted to the coin, and output column names
+    def format_frame(self, frame, name):
+        if name in self.spec.schemas:
+            frame = apply_schema(frame, self.spec.schemas[name])
+        return frame.rename(columns=self.spec.renames[name])
+    
     # Summary information written to DataFrame
     def get_address_information(self):
         self.summary_df = pd.DataFrame(self.address_endpoint['data']
-                                       [self.address]['address'], index=[0])
-        rename_dict = {'balance': 'Balance (Satoshi)',
-                       'balance_btc': 'Balance (BTC)',
-                       'balance_usd': 'Balance (USD)',
-                       'first_seen_receiving': 'First Seen Receiving',
-                       'first_seen_spending': 'First Seen Spending',
-                       'last_seen_receiving': 'Last Seen Receiving',
-                       'last_seen_spending': 'Last Seen Spending',
-                       'transaction_count': 'Transaction Count',                       
-                       'output_count': 'Output Count',
-                       'unspent_output_count': 'Unspent Output Count',
-                       'received': 'Received (Satoshi)',
-                       'received_btc': 'Received (BTC)',
-                       'received_usd': 'Received (USD)',
-                       'spent': 'Spent (Satoshi)',
-                       'spent_btc': 'Spent (BTC)',
-                       'spent_usd': 'Spent (USD)',
-                       'script_hex': 'Script Hex',
-                       'scripthash_type': 'Script Hash Type',
-                       'type': 'Type'
-                        }
-        self.summary_df = self.summary_df.rename(columns=rename_dict)
+                                       [self.key]['address'], index=[0])
+        self.summary_df = self.format_frame(self.summary_df, 'summary')
         return self.summary_df
     
-    # Block information written to DataFrame
-    def get_block_information(self):
-        transaction = [self.data[i]['transaction'] 
-                       for i in range(len((self.data)))]
-        self.block_df = pd.json_normalize([transaction[i] 
-                                           for i in range(len(transaction))])
-        # Convert satoshi to BTC value
-        self.block_df['input_total_btc'] = [amt*pow(10,-8) for amt in 
-                                            self.block_df['input_total']]
-        self.block_df['output_total_btc'] = [amt*pow(10,-8) for amt in 
-                                            self.block_df['output_total']]
-        rename_dict = {'block_id': 'Block ID',
-                        'id': 'ID',
-                        'hash': 'Transaction Hash',
-                        'date': 'Date',
-                        'time': 'DateTime',
-                        'size': 'Size',
-                        'weight': 'Weight',
-                        'version': 'Version',
-                        'lock_time': 'Lock Time',
-                        'is_coinbase': 'From Coinbase',
-                        'has_witness': 'Has Witness',
-                        'input_count': 'Input Count',
-                        'output_count': 'Output Count',
-                        'input_total': 'Input Total (Satoshi)',
-                        'input_total_btc': 'Input Total (BTC)',
-                        'input_total_usd': 'Input Total (USD)',
-                        'output_total': 'Output Total (Satoshi)',
-                        'output_total_btc': 'Output Total (BTC)',
-                        'output_total_usd': 'Output Total (USD)',
-                        'fee': 'Fee (Satoshi)',
-                        'fee_usd': 'Fee (USD)',
-                        'fee_per_kb': 'Fee per size (Satoshi)',
-                        'fee_per_kb_usd': 'Fee per size (USD)',
-                        'fee_per_kwu': 'Fee per weight (Satoshi)',
-                        'fee_per_kwu_usd': 'Fee per weight (USD)',
-                        'cdd_total': 'CDD (Coin Days Destroyed) Total',
-                        'is_rbf': 'Replace-By-Fee (RBF)'
-                        }
-        self.block_df = self.block_df.rename(columns=rename_dict)
-        self.block_df = self.block_df[::-1].reset_index(drop=True)
-        return self.block_df
-    
-    def get_transaction(self, txs, attempt=0):
-        if self.api_key is None:
-            if attempt == 0:
-                url = f'https://api.blockchair.com/bitcoin/dashboards/transactions/{txs}'
-                response = self.session.get(url)
-            elif attempt == 1:
-                url = f'https://api.blockchair.com/bitcoin/dashboards/transactions/{txs}'
-                response = self.session.get(url)
-                time.sleep(1.5)
-        else:
-            if attempt == 0:
-                url = f'https://api.blockchair.com/bitcoin/dashboards/transactions/{txs}?key={self.api_key}'
-                response = self.session.get(url)
-        return response
-    
     def get_transaction_endpoint(self):
-        self.txs_hash_lst = self.address_endpoint['data'][self.address]['transactions']
-        i = 0
-        joined = []
-        while i <= len(self.txs_hash_lst):
-            for tx in self.txs_hash_lst:
-                joined.append(','.join(self.txs_hash_lst[i:i+10]))
-                i += 10
-        joined = [string for string in joined if string != ""]
+        txs_hash_lst = self.item_hashes(self.address_endpoint['data']
+                                        [self.key][self.items_field])
         
         start = datetime.datetime.now()
         logging.info('Start requests session - {} transactions'
-                     .format(len(self.txs_hash_lst)))
-        
-        response = [self.get_transaction(txs) for txs in joined]
-        
-        try:
-            self.data = [response[r].json() for r in range(len(response))]
-        except AttributeError:
-            logging.info('Exceed API limit - Restarting requests session')
-            time.sleep(1)
-            response = [self.get_transaction(txs, 1) for txs in joined]
-            self.data = [response[r].json() for r in range(len(response))]
+                     .format(len(txs_hash_lst)))
         
-        joined = [joined[i].split(',') for i in range(len(joined))]
-        try:
-            self.data = [self.data[i]['data'][j] 
-                         for i in range(len(self.data)) for j in joined[i]]
-        except TypeError:
-            # logging.warning('Exceed API limit - Increase waiting time / Use API key instead')
-            raise Exception('Exceed API limit - Increase waiting time / Use API key instead')
+        self.data = self.fetcher.fetch_transactions(txs_hash_lst)
         finish = datetime.datetime.now() - start
         logging.info('Total time taken: {}'.format(finish))
         return self.data
+    
+    # Streamed output already holds every page; otherwise the frames are written
+    def output_data(self, output=None):
+        with self.metrics.timer('export'):
+            if output is None:
+                output = self.open_output()
+                for name, df in self.frames.items():
+                    output.write(name, df)
+            logging.info(f'Writing data to {type(output).__name__}')
+            output.close()
+        logging.info(f'Exported as {output.path}')
+        logging.info(f'Saved file path - {os.path.abspath(output.path)}')
+    
+    # The checkpoint stops at the newest confirmed item, so the unconfirmed
+    # ones (block_id == -1) listed ahead of it are fetched again next run
+    def find_latest_confirmed(self):
+        items = self.address_endpoint['data'][self.key][self.items_field]
+        for tx, block_id in zip(self.item_hashes(items), self.item_block_ids()):
+            if block_id != -1:
+                self.latest_hash = tx
+                return
+            self.unconfirmed += 1
+    
+    # Without a confirmed item the previous checkpoint, if any, still holds
+    def checkpoint_entry(self):
+        if self.latest_hash is None:
+            return self.state or {self.count_field: 0, 'last_hash': None}
+        return {self.count_field: int(self.item_count) - self.unconfirmed, 
+                'last_hash': self.latest_hash}
+    
+    def save_checkpoint(self):
+        if self.checkpoint is None:
+            return
+        self.checkpoint.update(self.chain, self.key, **self.checkpoint_entry())
+
+# Bitcoin-style chains: the dashboard lists transaction hashes and each
+# transaction payload carries its inputs and outputs
+class UTXOTracker(AddressTracker):
+    items_field = 'transactions'
+    count_field = 'transaction_count'
+    blocks_need_transactions = True
+    
+    @staticmethod
+    def item_hashes(txs):
+        return list(txs)
+    
+    # Block of each item on the current page, from its transaction payload
+    def item_block_ids(self):
+        return [payload['transaction']['block_id'] for payload in self.data]
+    
+    def transform_page(self, transactions=True):
+        self.get_transaction_endpoint()
+        with self.metrics.timer('normalize'):
+            self.get_block_information()
+            self.extract_transaction_data()
+        with self.metrics.timer('transform'):
+            self.transform_transaction_information()
+    
+    # Block information written to DataFrame
+    def get_block_information(self):
+        self.block_df = pd.json_normalize([self.data[i]['transaction'] 
+                                           for i in range(len(self.data))])
+        self.block_df = self.format_frame(self.block_df, 'block')
+        self.block_df = self.block_df[::-1].reset_index(drop=True)
+        return self.block_df
         
     def extract_transaction_data(self):
-        inputs = [self.data[i]['inputs']
-                  for i in range(len((self.data)))]
-        outputs = [self.data[i]['outputs'] 
-                   for i in range(len((self.data)))]        
-        
-        for i in range(len(inputs)):
-            self.input_df = self.input_df.append(inputs[i], 
-                                                 ignore_index=True)
-        for i in range(len(outputs)):
-            self.output_df = self.output_df.append(outputs[i], 
-                                                   ignore_index=True)
-            
+        inputs = ColumnBuilder()
+        outputs = ColumnBuilder()
+        for i in range(len(self.data)):
+            inputs.extend(self.data[i]['inputs'])
+            outputs.extend(self.data[i]['outputs'])
+        self.input_df = inputs.to_frame()
+        self.output_df = outputs.to_frame()
+        return self.input_df, self.output_df
+    
+    # Every output the address received, spent or not, gives the transactions
+    # it received in and the ones spending them, which are every transaction
+    # it sent from. The outputs lack the senders and most transaction fields,
+    # so those transactions are fetched from the transaction dashboards and
+    # transformed like a single dashboard page
+    def transform_tables(self, transactions=True):
+        outputs = self.table_rows('outputs', 'recipient')
+        if outputs.empty:
+            self.block_df = pd.DataFrame()
+            self.txs_df = pd.DataFrame()
+            return
+        columns = ['block_id', 'transaction_id', 'transaction_hash']
+        spending = outputs[outputs['is_spent'] == True][[f'spending_{column}' 
+                                                         for column in columns]]
+        txs = (pd.concat([outputs[columns], spending.set_axis(columns, axis=1)], 
+                         ignore_index=True)
+               .drop_duplicates(subset='transaction_hash'))
+        # Newest first as on the dashboard, unconfirmed (block_id -1) on top
+        txs = (txs.assign(block_id=txs['block_id'].replace(-1, np.inf))
+               .sort_values(['block_id', 'transaction_id'], ascending=False))
+        self.data = self.fetcher.fetch_transactions(list(txs['transaction_hash']))
+        with self.metrics.timer('normalize'):
+            self.get_block_information()
+            self.extract_transaction_data()
+        with self.metrics.timer('transform'):
+            self.transform_transaction_information()
+    
     # In-depth transaction information written to DataFrame
     def transform_transaction_information(self):
-        # Combination of input and output df
-        txs_df = pd.merge(self.input_df[['recipient', 'spending_block_id']], 
-                          self.output_df, 
-                          left_on='spending_block_id',
-                          right_on='block_id',
-                          how='outer',
-                          suffixes=('_x', '')
-                          ).rename(columns={'recipient_x':'from', 
-                                            'recipient':'to'}
-                                            ).filter(regex='^(?!.*_x)')                
-        txs_df = txs_df[(txs_df['from']==self.address) | 
-                        (txs_df['to']==self.address)]
+        # Senders of each transaction, collapsed into one comma-separated
+        # From value so every output keeps a single row
+        inputs = (self.input_df.reindex(columns=['recipient', 'spending_transaction_hash'])
+                  .rename(columns={'recipient': 'from', 
+                                   'spending_transaction_hash': 'transaction_hash'})
+                  .dropna(subset=['from'])
+                  .drop_duplicates())
+        senders = inputs.groupby('transaction_hash', sort=False)['from'].agg(', '.join)
+        outputs = self.output_df.rename(columns={'recipient': 'to'})
         
-        # Convert satoshi to BTC value
-        txs_df['value_btc'] = [amt*pow(10,-8) for amt in txs_df['value']]
+        # Outputs involving the address are selected before the senders are
+        # mapped on, so the work grows with the address's own transactions
+        # rather than block fan-out: every output of a transaction it sends
+        # from, and the outputs it receives, once per (hash, index)
+        sent = inputs.loc[inputs['from'] == self.address, 'transaction_hash']
+        txs_df = outputs[outputs['transaction_hash'].isin(sent) | 
+                         (outputs['to'] == self.address)]
+        txs_df = txs_df.drop_duplicates(subset=['transaction_hash', 'index'])
+        txs_df = txs_df.assign(**{'from': txs_df['transaction_hash'].map(senders)})
+        txs_df = txs_df[['from', *outputs.columns]]
         
-        rename_dict = {'from': 'From',
-                       'to': 'To',
-                       'block_id': 'Block ID',
-                       'transaction_id': 'Transaction ID',
-                       'index': 'Index',
-                       'transaction_hash': 'Transaction Hash',
-                       'date': 'Date',
-                       'time': 'DateTime',
-                       'value': 'Value (Satoshi)',
-                       'value_btc' : 'Value (BTC)',
-                       'value_usd': 'Value (USD)',
-                       'type': 'Type',
-                       'script_hex': 'Script Hex',
-                       'is_from_coinbase': 'From Coinbase',
-                       'is_spendable': 'Spendable',
-                       'is_spent': 'Spent',
-                       'spending_block_id': 'Spending Block ID',
-                       'spending_transaction_id': 'Spending Transaction ID',
-                       'spending_index': 'Spending Index',
-                       'spending_transaction_hash': 'Spending Transaction Hash',
-                       'spending_date': 'Spending Date',
-                       'spending_time': 'Spending DateTime',
-                       'spending_value_usd': 'Spending Value (USD)',
-                       'spending_sequence': 'Spending Sequence',
-                       'spending_signature_hex': 'Spending Signature Hex',
-                       'spending_witness': 'Spending Witness',
-                       'lifespan': 'Lifespan',
-                       'cdd': 'CDD (Coin Days Destroyed)'
-                       }
-        self.txs_df = txs_df.rename(columns=rename_dict).fillna(value=np.nan)
+        self.txs_df = self.format_frame(txs_df, 'transaction').fillna(value=np.nan)
         self.txs_df = self.txs_df[::-1].reset_index(drop=True)
         return self.txs_df
+
+# Fields of a call on the address dashboards, the Block columns of
+# account chains whichever backend fetched them
+CALL_COLUMNS = ['block_id', 'transaction_hash', 'index', 'time', 'sender', 
+                'recipient', 'value', 'value_usd', 'transferred']
+
+# Ethereum-style chains: the dashboard lists calls, each referencing the
+# transaction it belongs to
+class AccountTracker(AddressTracker):
+    items_field = 'calls'
+    count_field = 'call_count'
+    item_records = True
     
-    def output_excel(self):
-        logging.info('Writing data to Excel')
-        path = f'{os.path.abspath(os.path.dirname(sys.argv[0]))}\{self.file_name}'
-        writer = pd.ExcelWriter(self.file_name, engine='xlsxwriter')
-        self.summary_df.to_excel(writer, 
-                                 sheet_name='Summary',
-                                 index=False)
-        self.block_df.to_excel(writer, 
-                               sheet_name='Block',
-                               index=False)
-        self.txs_df.to_excel(writer, 
-                             sheet_name='Transaction',
-                             index=False)
-        writer.save()
-        logging.info(f'Exported as {self.file_name}')
-        logging.info(f'Saved file path - {path}')
-
-class ETH:   
-    def __init__(self, eth_address, file_name, api_key=None):
-        self.address = eth_address
-        self.file_name = f'eth_{file_name}.xlsx'
-        self.api_key = api_key
-        self.url = f'https://api.blockchair.com/ethereum/dashboards/address/{eth_address}?limit=10000'
-        self.address_endpoint = json.load(urlopen(self.url))
-        self.session = requests.Session()
-        
-        self.get_address_information()
-        self.get_block_information()
+    @staticmethod
+    def item_hashes(calls):
+        return list(calls['transaction_hash']) if len(calls) else []
+    
+    # Block of each call on the current page
+    def item_block_ids(self):
+        calls = self.address_endpoint['data'][self.key][self.items_field]
+        return list(calls['block_id']) if len(calls) else []
+    
+    # Block rows come from the calls on the dashboard page itself
+    def transform_page(self, transactions=True):
+        with self.metrics.timer('normalize'):
+            self.get_block_information()
+        if not transactions:
+            return
         self.get_transaction_endpoint()
-        self.transform_transaction_information()
-        self.output_excel()
-            
-    # Summary information written to DataFrame
-    def get_address_information(self):
-        self.summary_df = pd.DataFrame(self.address_endpoint['data']
-                                       [self.address.lower()]['address'], 
-                                       index=[0])
-        # Convert columns in gwei to ETH value 
-        self.summary_df['balance_eth'] = [float(value)/pow(10, 9) 
-                                          for value in self.summary_df['balance']]
-        self.summary_df['fees_approximate_eth'] = [float(value)/pow(10, 9) 
-                                                   for value in self.summary_df['fees_approximate']]
-        self.summary_df['received_approximate_eth'] = [float(value)/pow(10, 9) 
-                                                       for value in self.summary_df['received_approximate']]
-        self.summary_df['spent_approximate_eth'] = [float(value)/pow(10, 9) 
-                                                    for value in self.summary_df['spent_approximate']]
-        rename_dict = {'balance': 'Balance (Gwei)',
-                       'balance_eth': 'Balance (ETH)',
-                       'balance_usd': 'Balance (USD)',
-                       'call_count': 'Call Count',
-                       'contract_code_hex': 'Contract Code Hex',
-                       'contract_created': 'Contract Created',
-                       'contract_destroyed': 'Contract Destroyed',
-                       'fees_approximate': 'Fees Approximate (Gwei)',
-                       'fees_approximate_eth': 'Fees Approximate (ETH)',
-                       'fees_usd': 'Fees (USD)',
-                       'first_seen_receiving': 'First Seen Receiving',
-                       'first_seen_spending': 'First Seen Spending',
-                       'last_seen_receiving': 'Last Seen Receiving',
-                       'last_seen_spending': 'Last Seen Spending',
-                       'received_approximate': 'Received Approximate (Gwei)',
-                       'received_approximate_eth': 'Received Approximate (ETH)',
-                       'received_usd': 'Received (USD)',
-                       'receiving_call_count': 'Receiving Call Count',
-                       'spending_call_count': 'Spending Call Count',
-                       'spent_approximate': 'Spent Approximate (Gwei)',
-                       'spent_approximate_eth': 'Spending Approximate (ETH)',
-                       'spent_usd': 'Spent (USD)',
-                       'transaction_count': 'Transaction Count',
-                       'type': 'Type'
-                        }
-        self.summary_df = self.summary_df.rename(columns=rename_dict)
-        return self.summary_df
+        with self.metrics.timer('normalize'):
+            self.normalize_transactions()
+        with self.metrics.timer('transform'):
+            self.transform_transaction_information()
+    
+    # Calls sent or received by the address, with the dashboard's call fields,
+    # and the transactions they belong to. Transactions where the address only
+    # appears in internal calls are not in the table and come from the
+    # transaction dashboards
+    def transform_tables(self, transactions=True):
+        calls = self.table_rows('calls', 'sender', 'recipient')
+        if calls.empty:
+            self.block_df = pd.DataFrame()
+            self.txs_df = pd.DataFrame()
+            return
+        calls = (calls.drop_duplicates(subset=['transaction_hash', 'index'])
+                 .sort_values(['block_id', 'transaction_id', 'index'])
+                 .reindex(columns=CALL_COLUMNS))
+        with self.metrics.timer('transform'):
+            self.block_df = self.format_frame(calls, 'block').reset_index(drop=True)
+        if not transactions:
+            return
+        txs = self.table_rows('transactions', 'sender', 'recipient')
+        txs = txs.drop_duplicates(subset='hash') if not txs.empty else txs
+        known = set(txs['hash']) if not txs.empty else set()
+        missing = [tx for tx in dict.fromkeys(calls['transaction_hash']) if tx not in known]
+        if missing:
+            self.data = self.fetcher.fetch_transactions(missing)
+            txs = pd.concat([txs, self.normalize_transactions()], ignore_index=True)
+        with self.metrics.timer('transform'):
+            txs = txs.sort_values(['block_id', 'id'])
+            self.txs_df = (self.format_frame(txs, 'transaction')
+                           .fillna(value=np.nan).reset_index(drop=True))
     
     # Block information written to DataFrame
     def get_block_information(self):
-        # add_endpoint = json.load(urlopen(self.url))
-        self.block_df = pd.json_normalize(self.address_endpoint['data']
-                                          [self.address.lower()]['calls'])                          
-        # Convert columns in gwei to ETH value
-        self.block_df['value_eth'] = [float(value)/pow(10, 9) 
-                                      for value in self.block_df['value']]
-        rename_dict = {'block_id': 'Block ID',
-                        'transaction_hash': 'Transaction Hash',
-                        'index': 'Index',
-                        'time': 'DateTime',
-                        'sender': 'From',
-                        'recipient': 'To',
-                        'value': 'Value (Gwei)',
-                        'value_eth': 'Value (ETH)',
-                        'value_usd': 'Value (USD)',
-                        'transferred': 'Transferred',
-                        }
-        self.block_df = self.block_df.rename(columns=rename_dict)
+        self.block_df = self.address_endpoint['data'][self.key][self.items_field]
+        self.block_df = self.format_frame(self.block_df, 'block')
         self.block_df = self.block_df[::-1].reset_index(drop=True)
         return self.block_df
     
-    def get_transaction(self, txs, attempt=0):
-        if self.api_key is None:
-            if attempt == 0:
-                url = f'https://api.blockchair.com/ethereum/dashboards/transactions/{txs}'
-                response = self.session.get(url)
-            elif attempt == 1:
-                url = f'https://api.blockchair.com/ethereum/dashboards/transactions/{txs}'
-                response = self.session.get(url)
-                time.sleep(1.5)
-        else:
-            if attempt == 0:
-                url = f'https://api.blockchair.com/ethereum/dashboards/transactions/{txs}?key={self.api_key}'
-                response = self.session.get(url)
-        return response
-    
-    def get_transaction_endpoint(self):
-        txs_hash_lst = [self.address_endpoint['data'][self.address.lower()]['calls'][i]['transaction_hash'] 
-                        for i in range(len(self.address_endpoint['data'][self.address.lower()]['calls']))]
-        i = 0
-        joined = []
-        while i <= len(txs_hash_lst):
-            for tx in txs_hash_lst:
-                joined.append(','.join(txs_hash_lst[i:i+10]))
-                i += 10
-        joined = [string for string in joined if string != ""]
-        
-        start = datetime.datetime.now()
-        logging.info('Start requests session - {} transactions'
-                     .format(len(txs_hash_lst)))
-        response = [self.get_transaction(txs) for txs in joined]
-        
-        try:
-            self.data = [response[r].json() for r in range(len(response))]
-        except AttributeError:
-            logging.info('Exceed API limit - Restarting requests session')
-            time.sleep(1)
-            response = [self.get_transaction(txs, 1) for txs in joined]
-            self.data = [response[r].json() for r in range(len(response))]
-        
-        joined = [joined[i].split(',') for i in range(len(joined))]
-        
-        try:
-            self.data = [self.data[i]['data'][j]['transaction'] 
-                         for i in range(len(self.data)) for j in joined[i]]
-            self.data = pd.json_normalize(self.data)
-        except TypeError:
-            raise Exception('Exceed API limit - Increase waiting time / Use API key instead')
-        
-        finish = datetime.datetime.now() - start
-        logging.info('Total time taken: {}'.format(finish))
+    def normalize_transactions(self):
+        self.data = pd.json_normalize([self.data[i]['transaction'] 
+                                       for i in range(len(self.data))])
         return self.data
-
+    
     # In-depth transaction information written to DataFrame
     def transform_transaction_information(self):
-        # Convert columns in gwei to ETH value
-        self.data['value_eth'] = [float(value)/pow(10, 9) 
-                                  for value in self.data['value']]
-        self.data['internal_value_eth'] = [float(value)/pow(10, 9) 
-                                           for value in self.data['internal_value']]
-        self.data['fee_eth'] = [float(value)/pow(10, 9) 
-                                for value in self.data['fee']]
-        self.data['gas_price_eth'] = [float(value)/pow(10, 9) 
-                                      for value in self.data['gas_price']]
-        self.data['effective_gas_price_eth'] = [float(value)/pow(10, 9) 
-                                                for value in self.data['effective_gas_price']]
-        self.data['max_fee_per_gas_eth'] = [float(value)/pow(10, 9) 
-                                            for value in self.data['max_fee_per_gas']]
-        self.data['max_priority_fee_per_gas_eth'] = [float(value)/pow(10, 9) 
-                                                     for value in self.data['max_priority_fee_per_gas']]
-        self.data['base_fee_per_gas_eth'] = [float(value)/pow(10, 9) 
-                                             for value in self.data['base_fee_per_gas']]
-        rename_dict = {'block_id': 'Block ID',
-                       'id': 'ID',
-                       'index': 'Index',
-                       'hash': 'Transaction Hash',
-                       'date': 'Date',
-                       'time': 'DateTime',
-                       'failed': 'Failed',
-                       'type': 'Type',
-                       'sender': 'From',
-                       'recipient': 'To',
-                       'call_count': 'Call Count',
-                       'value': 'Value (Gwei)',
-                       'value_eth' : 'Value (ETH)',
-                       'value_usd': 'Value (USD)',
-                       'internal_value': 'Internal Value',
-                       'internal_value_eth': 'Internal Value (ETH)',
-                       'internal_value_usd': 'Internal Value (USD)',
-                       'fee': 'Fee (Gwei)',
-                       'fee_eth': 'Fee (ETH)',
-                       'fee_usd': 'Fee (USD)',
-                       'gas_used': 'Gas Used',
-                       'gas_limt': 'Gas Limit',
-                       'gas_price': 'Gas Price (Gwei)',
-                       'gas_price_eth': 'Gas Price (ETH)',
-                       'effective_gas_price': 'Effective Gas Price (Gwei)',
-                       'effective_gas_price_eth': 'Effective Gas Price (ETH)',
-                       'max_fee_per_gas': 'Max Fee per Gas (Gwei)',
-                       'max_fee_per_gas_eth': 'Max Fee per Gas (ETH)',
-                       'max_priority_fee_per_gas': 'Max Priority Fee per Gas (Gwei)',
-                       'max_priority_fee_per_gas_eth': 'Max Priority Fee per Gas (ETH)',
-                       'base_fee_per_gas': 'Base Fee per Gas (Gwei)',
-                       'base_fee_per_gas_eth': 'Base Fee per Gas (ETH)',
-                       'input_hex': 'Input Hex',
-                       'nonce': 'Nonce',
-                       'version': 'Version',
-                       'burned': 'Burned',
-                       'v': 'v',
-                       'r': 'r',
-                       's': 's',
-                       'version': 'Version',
-                       'type_2718': 'type_2718'
-                       }
-        self.txs_df = self.data.rename(columns=rename_dict).fillna(value=np.nan)
+        self.txs_df = self.format_frame(self.data, 'transaction').fillna(value=np.nan)
         self.txs_df = self.txs_df[::-1].reset_index(drop=True)
         return self.txs_df
-    
-    def output_excel(self):
-        logging.info('Writing data to Excel')
-        path = f'{os.path.abspath(os.path.dirname(sys.argv[0]))}\{self.file_name}'
-        writer = pd.ExcelWriter(self.file_name, engine='xlsxwriter')
-        self.summary_df.to_excel(writer, 
-                                 sheet_name='Summary',
-                                 index=False)
-        self.block_df.to_excel(writer, 
-                               sheet_name='Block',
-                               index=False)
-        self.txs_df.to_excel(writer, 
-                             sheet_name='Transaction',
-                             index=False)
-        writer.save()
-        logging.info(f'Exported as {self.file_name}')
-        logging.info(f'Saved file path - {path}')
+
+# Supported chains. Legacy base58 addresses starting with 1 or 3 are read as
+# bitcoin, so Bitcoin Cash addresses are given in CashAddr form and Litecoin
+# P2SH addresses in their M form
+register_chain(ChainSpec('bitcoin', 'Bitcoin', 'btc', 
+                         r'bc1[02-9ac-hj-np-z]{8,87}|BC1[02-9AC-HJ-NP-Z]{8,87}|'
+                         r'[13][1-9A-HJ-NP-Za-km-z]{25,34}', 
+                         UTXOTracker, utxo_schemas('BTC'), utxo_renames('BTC', 'Satoshi')))
+register_chain(ChainSpec('ethereum', 'Ethereum', 'eth', r'0x[0-9a-fA-F]{40}', 
+                         AccountTracker, ETHEREUM_SCHEMAS, ETHEREUM_RENAMES, 
+                         lower_key=True))
+register_chain(ChainSpec('litecoin', 'Litecoin', 'ltc', 
+                         r'ltc1[02-9ac-hj-np-z]{8,87}|LTC1[02-9AC-HJ-NP-Z]{8,87}|'
+                         r'[LM][1-9A-HJ-NP-Za-km-z]{25,34}', 
+                         UTXOTracker, utxo_schemas('LTC'), utxo_renames('LTC', 'Litoshi')))
+register_chain(ChainSpec('dogecoin', 'Dogecoin', 'doge', 
+                         r'[DA9][1-9A-HJ-NP-Za-km-z]{25,34}', 
+                         UTXOTracker, utxo_schemas('DOGE'), utxo_renames('DOGE', 'Koinu')))
+register_chain(ChainSpec('bitcoin-cash', 'Bitcoin Cash', 'bch', 
+                         r'(bitcoincash:)?[qp][02-9ac-hj-np-z]{41}', 
+                         UTXOTracker, utxo_schemas('BCH'), utxo_renames('BCH', 'Satoshi')))
@@ -0,0 +1,285 @@
+import os
+import re
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from blockchair import CHAINS, UTXOTracker, fixture_path
+
+# Stub of the Blockchair address and transaction dashboards. Recorded
+# fixtures are served first, then synthetic addresses of any size; every
+# response is delayed by latency and a share error_rate is refused with 429
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.05
+    error_rate = 0.0
+    fixtures = None
+    # Synthetic addresses in order; the n-th owns transactions (n << 32) + i,
+    # transactions of them unless counts gives it more
+    addresses = []
+    transactions = 0
+    counts = {}
+    # Newest transactions of each address whose payloads are still unconfirmed
+    unconfirmed = 0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        if random.random() < self.error_rate:
+            return self.respond(429, b'', {'Retry-After': '0'})
+        if self.fixtures is not None:
+            path = fixture_path(self.fixtures, self.path)
+            if os.path.exists(path):
+                with open(path) as f:
+                    fixture = json.load(f)
+                return self.respond(fixture['status_code'], fixture['body'].encode())
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        limit = int(query.get('limit', ['10'])[0])
+        offset = int(query.get('offset', ['0'])[0])
+        path = parts.path.split('/')
+        if len(path) == 3:
+            field, value = re.fullmatch(r'(\w+)\((.*)\)', query['q'][0]).groups()
+            rows = self.table_rows(path[1], path[2], field, value)
+            body = {'data': rows[offset:offset + limit],
+                    'context': {'total_rows': len(rows), 'limit': limit,
+                                'offset': offset}}
+            return self.respond(200, json.dumps(body).encode())
+        _, chain, _, endpoint, target = path
+        if endpoint == 'address':
+            data = self.address_dashboard(chain, target, limit, offset)
+        else:
+            data = {h: self.transaction_payload(chain, h) for h in target.split(',')}
+        self.respond(200, json.dumps({'data': data}).encode())
+
+    # One page of a synthetic address, newest transaction first
+    def address_dashboard(self, chain, address, limit, offset):
+        first = self.addresses.index(address) << 32
+        count = self.counts.get(address, self.transactions)
+        numbers = range(first + count - 1 - offset,
+                        max(first + count - 1 - offset - limit, first - 1), -1)
+        summary = (synthetic_eth_address(count) if chain == 'ethereum'
+                   else synthetic_btc_address(count))
+        # Addresses that gained transactions were last seen now
+        if address in self.counts:
+            now = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+            summary.update(last_seen_receiving=now, last_seen_spending=now)
+        if chain == 'ethereum':
+            return {address: {'address': summary,
+                              'calls': [synthetic_eth_call(i, address) for i in numbers]}}
+        return {address: {'address': summary,
+                          'transactions': [f'{i:064x}' for i in numbers]}}
+
+    # Transaction dashboard payload, in the mempool (block_id -1) if among the
+    # owner's unconfirmed newest transactions
+    def transaction_payload(self, chain, h):
+        payload = synthetic_payload(chain, h, self.addresses)
+        i = int(h[2:] if h.startswith('0x') else h, 16)
+        owner = i >> 32
+        if owner < len(self.addresses):
+            count = self.counts.get(self.addresses[owner], self.transactions)
+            if i >= (owner << 32) + count - self.unconfirmed:
+                payload['transaction']['block_id'] = -1
+        return payload
+
+    # Infinitable rows of a synthetic address, newest first: the outputs it
+    # received, each spent by its next (sending) transaction, or the calls and
+    # transactions it sent
+    def table_rows(self, chain, table, field, address):
+        if address not in self.addresses or (chain == 'ethereum') != (field == 'sender'):
+            return []
+        first = self.addresses.index(address) << 32
+        count = self.counts.get(address, self.transactions)
+        numbers = range(first + count - 1, first - 1, -1)
+        if table == 'calls':
+            return [dict(synthetic_eth_call(i, address), transaction_id=i)
+                    for i in numbers]
+        if table == 'transactions':
+            return [synthetic_eth_transaction(i, address)['transaction']
+                    for i in numbers]
+        spent_by = lambda j: (j, 700000 + j // 100, 0) if j < first + count else None
+        return [synthetic_btc_io(i, 0, address, 700000 + i // 100, spent_by(i + 1))
+                for i in numbers if i % 2 == 0]
+
+    def respond(self, status, body, headers={}):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+def start_stub_server(latency, error_rate=0.0, fixtures=None, addresses=(),
+                      transactions=0):
+    StubHandler.latency = latency
+    StubHandler.error_rate = error_rate
+    StubHandler.fixtures = fixtures
+    StubHandler.addresses = list(addresses)
+    StubHandler.transactions = transactions
+    StubHandler.counts = {}
+    StubHandler.unconfirmed = 0
+    server = StubServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# Output record shaped like the Blockchair bitcoin transaction dashboard;
+# spent_by is the (transaction id, block id, input index) spending it
+def synthetic_btc_io(i, index, recipient, block_id, spent_by=None):
+    spending = spent_by is not None
+    spending_id, spending_block_id, spending_index = spent_by or (None, None, None)
+    return {'block_id': block_id, 'transaction_id': i, 'index': index,
+            'transaction_hash': f'{i:064x}', 'date': '2022-01-01',
+            'time': '2022-01-01 00:00:00', 'value': 100000 + i, 'value_usd': 40.0,
+            'recipient': recipient, 'type': 'witness_v0_keyhash',
+            'script_hex': '0014' + '00' * 20, 'is_from_coinbase': False,
+            'is_spendable': None, 'is_spent': spending,
+            'spending_block_id': spending_block_id,
+            'spending_transaction_id': spending_id,
+            'spending_index': spending_index,
+            'spending_transaction_hash': f'{spending_id:064x}' if spending else None,
+            'spending_date': '2022-01-02' if spending else None,
+            'spending_time': '2022-01-02 00:00:00' if spending else None,
+            'spending_value_usd': 41.0 if spending else None,
+            'spending_sequence': 4294967295 if spending else None,
+            'spending_signature_hex': '30' * 36 if spending else None,
+            'spending_witness': '30' * 36 if spending else None,
+            'lifespan': 86400 if spending else None, 'cdd': 0.1 if spending else None}
+
+# Bech32-looking bitcoin address or hex ethereum address numbered n
+def synthetic_address(chain, n):
+    if chain == 'ethereum':
+        return f'0x{n + 1:040x}'
+    charset = 'qpzry9x8gf2tvdw0s3jn54khce6mua7l'
+    return 'bc1q' + ''.join(charset[(n >> 5 * k) & 31] for k in range(38))
+
+def synthetic_btc_address(transactions):
+    return {'type': 'witness_v0_keyhash', 'script_hex': '0014' + '00' * 20,
+            'balance': 0, 'balance_usd': 0.0, 'received': 100000 * transactions,
+            'received_usd': 40.0 * transactions, 'spent': 100000 * transactions,
+            'spent_usd': 40.0 * transactions, 'output_count': transactions,
+            'unspent_output_count': 0, 'first_seen_receiving': '2022-01-01 00:00:00',
+            'last_seen_receiving': '2022-01-01 00:00:00',
+            'first_seen_spending': '2022-01-02 00:00:00',
+            'last_seen_spending': '2022-01-02 00:00:00',
+            'scripthash_type': None, 'transaction_count': transactions}
+
+def synthetic_eth_address(calls):
+    return {'type': 'account', 'contract_code_hex': None,
+            'contract_created': None, 'contract_destroyed': None,
+            'balance': str(10**18 * calls), 'balance_usd': 1.0 * calls,
+            'received_approximate': str(2 * 10**18 * calls), 'received_usd': 2.0,
+            'spent_approximate': str(10**18 * calls), 'spent_usd': 1.0,
+            'fees_approximate': str(21 * 10**12 * calls), 'fees_usd': 0.1,
+            'receiving_call_count': 0, 'spending_call_count': calls,
+            'call_count': calls, 'transaction_count': calls,
+            'first_seen_receiving': None, 'last_seen_receiving': None,
+            'first_seen_spending': '2022-01-01 00:00:00',
+            'last_seen_spending': '2022-01-01 00:00:00'}
+
+def synthetic_eth_call(i, sender):
+    return {'block_id': 15000000 + i % 2**32, 'transaction_hash': f'0x{i:064x}',
+            'index': '0', 'time': '2022-01-01 00:00:00',
+            'sender': sender, 'recipient': f'0x{i % 2**32:040x}',
+            'value': str(10**18 + i % 2**32), 'value_usd': 1.0, 'transferred': True}
+
+def synthetic_eth_transaction(i, sender):
+    call = synthetic_eth_call(i, sender)
+    return {'transaction': {'block_id': call['block_id'], 'id': i, 'index': 0,
+                            'hash': call['transaction_hash'],
+                            'date': '2022-01-01', 'time': call['time'],
+                            'failed': False, 'type': 'call', 'sender': sender,
+                            'recipient': call['recipient'], 'call_count': 1,
+                            'value': call['value'], 'value_usd': 1.0,
+                            'internal_value': '0', 'internal_value_usd': 0.0,
+                            'fee': '21000000000000', 'fee_usd': 0.1,
+                            'gas_used': 21000, 'gas_limit': 21000,
+                            'gas_price': '1000000000',
+                            'effective_gas_price': '1000000000',
+                            'max_fee_per_gas': None, 'max_priority_fee_per_gas': None,
+                            'base_fee_per_gas': '900000000', 'nonce': i % 2**32,
+                            'v': '1', 'r': '2', 's': '3', 'version': None,
+                            'type_2718': 2, 'input_hex': '', 'burned': '0'},
+            'calls': []}
+
+# Two inputs from sender spending earlier outputs, one output per recipient
+def synthetic_btc_transaction(i, sender='bc1qsynthetic',
+                              recipients=('bc1qother0', 'bc1qother1'),
+                              block_id=None):
+    block_id = 700000 + i // 100 if block_id is None else block_id
+    transaction = {'block_id': block_id, 'id': i, 'hash': f'{i:064x}',
+                   'date': '2022-01-01', 'time': '2022-01-01 00:00:00',
+                   'size': 225, 'weight': 573, 'version': 2, 'lock_time': 0,
+                   'is_coinbase': False, 'has_witness': True, 'input_count': 2,
+                   'output_count': len(recipients), 'input_total': 200000 + 2 * i,
+                   'input_total_usd': 80.0, 'output_total': 199000 + 2 * i,
+                   'output_total_usd': 79.6, 'fee': 1000, 'fee_usd': 0.4,
+                   'fee_per_kb': 4444, 'fee_per_kb_usd': 1.7, 'fee_per_kwu': 1745,
+                   'fee_per_kwu_usd': 0.7, 'cdd_total': 0.2, 'is_rbf': False}
+    inputs = [synthetic_btc_io(10**9 + 2 * i + n, 0, sender, block_id - 1,
+                               (i, block_id, n)) for n in range(2)]
+    outputs = [synthetic_btc_io(i, n, recipient, block_id)
+               for n, recipient in enumerate(recipients)]
+    return {'transaction': transaction, 'inputs': inputs, 'outputs': outputs}
+
+# Dashboard payload of transaction hash h. Transactions of the n-th synthetic
+# address alternate between sending from and receiving to it
+def synthetic_payload(chain, h, addresses=()):
+    i = int(h[2:] if h.startswith('0x') else h, 16)
+    owner = i >> 32
+    address = addresses[owner] if owner < len(addresses) else None
+    if chain == 'ethereum':
+        return synthetic_eth_transaction(i, address or synthetic_address(chain, owner))
+    if address is None:
+        return synthetic_btc_transaction(i)
+    if i % 2:
+        return synthetic_btc_transaction(i, sender=address)
+    return synthetic_btc_transaction(i, recipients=(address, 'bc1qother1'))
+
+# Bitcoin tracker holding synthetic payloads, without paging or output
+def bitcoin_tracker(data, address=None):
+    btc = UTXOTracker.__new__(UTXOTracker)
+    btc.spec = CHAINS['bitcoin']
+    btc.address = address
+    btc.data = data
+    return btc
+
+# Tracker over one busy block where the address sends in one transaction and
+# receives in another among many unrelated ones
+def busy_block_tracker(transactions, address='bc1qtracked'):
+    data = [synthetic_btc_transaction(i, block_id=800000)
+            for i in range(transactions)]
+    data[0] = synthetic_btc_transaction(0, sender=address, block_id=800000)
+    data[1] = synthetic_btc_transaction(1, recipients=(address, 'bc1qother1'),
+                                        block_id=800000)
+    btc = bitcoin_tracker(data, address)
+    btc.extract_transaction_data()
+    return btc
+
+# Encoded address dashboard page with size items; bitcoin pages also carry
+# the address's utxo array, which the tracker never reads
+def synthetic_dashboard(chain, size):
+    address = synthetic_address(chain, 0)
+    if chain == 'ethereum':
+        page = {'address': synthetic_eth_address(size),
+                'calls': [synthetic_eth_call(i, address) for i in range(size)]}
+    else:
+        page = {'address': synthetic_btc_address(size),
+                'transactions': [f'{i:064x}' for i in range(size)],
+                'utxo': [{'block_id': 700000 + i // 100, 'transaction_hash': f'{i:064x}',
+                          'index': 0, 'value': 100000 + i} for i in range(size)]}
+    body = {'data': {address: page}, 'context': {'code': 200, 'limit': size}}
+    return address, json.dumps(body).encode()
+
+def serve_stub(port_queue, *args):
+    server = start_stub_server(*args)
+    port_queue.put(server.server_port)
+    threading.Event().wait()
@@ -0,0 +1,29 @@
+from blockchair import TransactionCache
+from stub_server import synthetic_btc_io, synthetic_btc_transaction
+
+
+def test_unspent_outputs_are_refetched(tmp_path):
+    cache = TransactionCache(str(tmp_path / 'cache.sqlite'))
+    unspent = synthetic_btc_transaction(0)
+    spent = synthetic_btc_transaction(1)
+    spent['outputs'] = [synthetic_btc_io(1, n, 'bc1qother0', 700000, (2, 700001, n))
+                        for n in range(2)]
+    cache.put_many('bitcoin', {'0' * 64: unspent, f'{1:064x}': spent})
+    assert list(cache.get_many('bitcoin', ['0' * 64, f'{1:064x}'])) == [f'{1:064x}']
+    
+    # Once the outputs are spent the payload is final and served from cache
+    unspent['outputs'] = [synthetic_btc_io(0, n, 'bc1qother0', 700000, (3, 700001, n))
+                          for n in range(2)]
+    cache.put_many('bitcoin', {'0' * 64: unspent})
+    cached = cache.get_many('bitcoin', ['0' * 64])['0' * 64]
+    assert all(output['is_spent'] for output in cached['outputs'])
+    assert cached['outputs'][0]['spending_transaction_hash'] == f'{3:064x}'
+
+
+def test_spent_in_unconfirmed_transaction_is_not_cached(tmp_path):
+    cache = TransactionCache(str(tmp_path / 'cache.sqlite'))
+    payload = synthetic_btc_transaction(0)
+    payload['outputs'] = [synthetic_btc_io(0, n, 'bc1qother0', 700000, (1, -1, n))
+                          for n in range(2)]
+    cache.put_many('bitcoin', {'0' * 64: payload})
+    assert cache.get_many('bitcoin', ['0' * 64]) == {}
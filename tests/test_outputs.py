@@ -0,0 +1,124 @@
+import json
+import logging
+
+import pandas as pd
+import pyarrow.dataset as ds
+import pytest
+
+from blockchair import CHAINS, Blockchair, FeatherOutput, ParquetOutput
+from stub_server import StubHandler, start_stub_server, synthetic_address
+
+UNLIMITED = 10**9
+ARROW_FORMATS = {'parquet': 'parquet', 'feather': 'ipc'}
+
+
+@pytest.fixture
+def stub():
+    logging.disable(logging.INFO)
+    servers = []
+
+    def start(chain, transactions):
+        address = synthetic_address(chain, 0)
+        server = start_stub_server(0, addresses=[address], transactions=transactions)
+        servers.append(server)
+        return address, f'http://127.0.0.1:{server.server_port}'
+
+    yield start
+    for server in servers:
+        server.shutdown()
+    logging.disable(logging.NOTSET)
+
+
+def read_dataset(directory, output_format):
+    return ds.dataset(directory, format=ARROW_FORMATS[output_format]).to_table().to_pandas()
+
+
+def sorted_frame(df):
+    columns = sorted(df.columns)
+    return df[columns].sort_values(columns).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('output_format', ARROW_FORMATS)
+@pytest.mark.parametrize('chain', ['bitcoin', 'ethereum'])
+def test_streamed_arrow_output_matches_single_batch(tmp_path, monkeypatch, stub,
+                                                   chain, output_format):
+    monkeypatch.chdir(tmp_path)
+    address, base_url = stub(chain, 35)
+    options = {'output_format': output_format, 'base_url': base_url,
+               'requests_per_minute': UNLIMITED}
+    Blockchair(address, 'streamed', stream=True, page_size=10, **options)
+    Blockchair(address, 'whole', **options)
+
+    prefix = CHAINS[chain].prefix
+    for name in ['block', 'transaction']:
+        streamed = read_dataset(f'{prefix}_streamed/{name}', output_format)
+        whole = read_dataset(f'{prefix}_whole/{name}', output_format)
+        assert len(streamed) == 35 if name == 'block' else len(streamed) > 0
+        pd.testing.assert_frame_equal(sorted_frame(streamed), sorted_frame(whole))
+
+
+@pytest.mark.parametrize('output_class', [ParquetOutput, FeatherOutput])
+def test_arrow_output_accepts_values_after_null_batch(tmp_path, output_class):
+    output = output_class(str(tmp_path / 'nulls'), spec=CHAINS['bitcoin'])
+    output.write('Transaction', pd.DataFrame({'Spending Transaction Hash': [None, None],
+                                              'Spending Value (USD)': [None, None]}))
+    output.write('Transaction', pd.DataFrame({'Spending Transaction Hash': ['ab', 'cd'],
+                                              'Spending Value (USD)': [1.5, None]}))
+    output.close()
+
+    table = ds.dataset(str(tmp_path / 'nulls' / 'transaction'),
+                       format=ARROW_FORMATS[output_class.extension]).to_table()
+    assert str(table.schema.field('Spending Transaction Hash').type) == 'large_string'
+    assert str(table.schema.field('Spending Value (USD)').type) == 'double'
+    assert table.column('Spending Transaction Hash').to_pylist() == [None, None, 'ab', 'cd']
+
+
+@pytest.mark.parametrize('output_format', ARROW_FORMATS)
+def test_incremental_arrow_parts_share_schema(tmp_path, monkeypatch, stub, output_format):
+    monkeypatch.chdir(tmp_path)
+    address, base_url = stub('bitcoin', 20)
+    options = {'output_format': output_format, 'base_url': base_url,
+               'requests_per_minute': UNLIMITED, 'checkpoint': 'checkpoint.json',
+               'stream': True, 'page_size': 10}
+    Blockchair(address, 'run', **options)
+    StubHandler.counts[address] = 35
+    Blockchair(address, 'run', **options)
+
+    dataset = ds.dataset('btc_run/block', format=ARROW_FORMATS[output_format])
+    schemas = {str(fragment.physical_schema) for fragment in dataset.get_fragments()}
+    assert len(dataset.files) == 2 and len(schemas) == 1
+    assert dataset.count_rows() == 35
+
+
+def test_infinitable_bitcoin_matches_dashboards(tmp_path, monkeypatch, stub):
+    monkeypatch.chdir(tmp_path)
+    address, base_url = stub('bitcoin', 25)
+    options = {'output_format': 'parquet', 'base_url': base_url,
+               'requests_per_minute': UNLIMITED}
+    Blockchair(address, 'dashboards', **options)
+    Blockchair(address, 'tables', backend='infinitable', **options)
+
+    for name in ['block', 'transaction']:
+        dashboards = read_dataset(f'btc_dashboards/{name}', 'parquet')
+        tables = read_dataset(f'btc_tables/{name}', 'parquet')
+        assert len(tables) == 25 if name == 'block' else 'From' in tables
+        pd.testing.assert_frame_equal(tables, dashboards)
+
+
+def test_checkpoint_stops_at_newest_confirmed_transaction(tmp_path, monkeypatch, stub):
+    monkeypatch.chdir(tmp_path)
+    address, base_url = stub('bitcoin', 20)
+    StubHandler.unconfirmed = 2
+    options = {'output_format': 'parquet', 'base_url': base_url,
+               'requests_per_minute': UNLIMITED, 'checkpoint': 'checkpoint.json'}
+    Blockchair(address, 'run', **options)
+    with open('checkpoint.json') as f:
+        state = json.load(f)[f'bitcoin:{address}']
+    assert state == {'transaction_count': 18, 'last_hash': f'{17:064x}'}
+
+    # Once confirmed, the two transactions are fetched again
+    StubHandler.unconfirmed = 0
+    Blockchair(address, 'run', **options)
+    blocks = read_dataset('btc_run/block', 'parquet')
+    assert len(blocks) == 22
+    assert (blocks['Block ID'] == -1).sum() == 2
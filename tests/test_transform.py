@@ -0,0 +1,22 @@
+from stub_server import bitcoin_tracker, busy_block_tracker, synthetic_btc_transaction
+
+
+def test_busy_block_keeps_only_the_address_rows():
+    btc = busy_block_tracker(200)
+    txs_df = btc.transform_transaction_information()
+    # Both outputs of the sending transaction, and the received output
+    assert len(txs_df) == 3
+    assert sorted(txs_df['Transaction Hash'].unique()) == [f'{0:064x}', f'{1:064x}']
+
+
+def test_multiple_senders_share_one_row_per_output():
+    address = 'bc1qtracked'
+    payload = synthetic_btc_transaction(0, sender='bc1qsender0',
+                                        recipients=(address, 'bc1qother1'))
+    payload['inputs'][1]['recipient'] = 'bc1qsender1'
+    btc = bitcoin_tracker([payload], address)
+    btc.extract_transaction_data()
+    txs_df = btc.transform_transaction_information()
+    assert len(txs_df) == 1
+    assert txs_df.loc[0, 'To'] == address
+    assert txs_df.loc[0, 'From'] == 'bc1qsender0, bc1qsender1'